@@ -0,0 +1,164 @@
+"""Micro benchmarks of the Memoize (ObjectsPool) implementation.
+
+Run with: python benchmarks/bench_memoize.py [benchmark-name ...]
+
+Each benchmark prints the best (per operation) latency, out of a few repeats,
+of the compared implementations.
+"""
+
+import sys
+import threading
+import time
+import timeit
+from typing import Callable, Dict
+
+from software_patterns import ObjectsPool
+from software_patterns.memoize import PoolStats, ShardedObjectsPool, make_key
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(function: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def report(label: str, statement: Callable[[], object], number: int = 200_000) -> float:
+    best = min(timeit.repeat(statement, number=number, repeat=5)) / number
+    print(f'  {label:<40} {best * 1e9:>10.1f} ns/op')
+    return best
+
+
+def string_join_key(*args, **kwargs) -> int:
+    """The key builder that ObjectsPool used by default, before 'make_key'."""
+    return hash(
+        '-'.join(
+            [str(_) for _ in args] + [f'{key}={str(value)}' for key, value in kwargs.items()]
+        )
+    )
+
+
+@benchmark
+def key_building():
+    """Per-lookup latency of get_object hits, using each key builder."""
+    cases = {
+        'single int': ((42,), {}),
+        'int and str': ((42, 'some-name'), {}),
+        'args and kwargs': ((42, 'some-name', 3.5), {'flag': True, 'mode': 'fast'}),
+    }
+    for case, (args, kwargs) in cases.items():
+        print(case)
+        legacy_pool = ObjectsPool(lambda *a, **kw: object(), hash_callback=string_join_key)
+        pool = ObjectsPool(lambda *a, **kw: object())
+        timings = []
+        for label, a_pool in (('string join (legacy)', legacy_pool), ('make_key', pool)):
+            a_pool.get_object(*args, **kwargs)
+            timings.append(report(label, lambda: a_pool.get_object(*args, **kwargs)))
+        print(f'  speedup: x{timings[0] / timings[1]:.2f}')
+    print('key building only')
+    report('string join (legacy)', lambda: string_join_key(42, 'some-name', flag=True))
+    report('make_key', lambda: make_key(42, 'some-name', flag=True))
+
+
+@benchmark
+def stats_overhead():
+    """Per-lookup cost of collecting statistics, on get_object hits."""
+    timings = []
+    for label, stats in (
+        ('no stats', None),
+        ('stats', PoolStats()),
+        ('stats, sampling 1/100 keys', PoolStats(sample_every=100)),
+    ):
+        pool = ObjectsPool(lambda *a: object(), stats=stats)
+        pool.get_object(42, 'some-name')
+        timings.append(report(label, lambda: pool.get_object(42, 'some-name')))
+    print(f'  overhead: {(timings[1] - timings[0]) * 1e9:.1f} ns/op')
+
+
+@benchmark
+def batch_lookup():
+    """Throughput of get_objects_many, against a loop of get_object calls."""
+    arguments = [(key, 'some-name') for key in range(1000)]
+
+    def build(key, name):
+        return [key, name]
+
+    def build_many(batch):
+        return [[key, name] for key, name in batch]
+
+    print('all hits (per batch of 1000)')
+    pool = ObjectsPool(build)
+    pool.get_objects_many(arguments)
+    loop = report('get_object loop', lambda: [pool.get_object(*a) for a in arguments], 200)
+    batch = report('get_objects_many', lambda: pool.get_objects_many(arguments), 200)
+    print(f'  speedup: x{loop / batch:.2f}')
+
+    print('all misses (per batch of 1000)')
+    pool = ObjectsPool(build, bulk_callback=build_many)
+
+    def cold_loop():
+        pool.clear()
+        return [pool.get_object(*a) for a in arguments]
+
+    def cold_batch():
+        pool.clear()
+        return pool.get_objects_many(arguments)
+
+    loop = report('get_object loop', cold_loop, 200)
+    batch = report('get_objects_many, bulk callback', cold_batch, 200)
+    print(f'  speedup: x{loop / batch:.2f}')
+
+
+def throughput(
+    get_object: Callable[[int], object], threads: int, requests: int = 100_000
+) -> float:
+    """Requests per second, of threads concurrently requesting (pooled) objects."""
+    barrier = threading.Barrier(threads + 1)
+    keys = range(1024)
+
+    def run():
+        barrier.wait()
+        for index in range(requests // threads):
+            get_object(keys[index & 1023])
+
+    workers = [threading.Thread(target=run) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    barrier.wait()
+    start = time.perf_counter()
+    for worker in workers:
+        worker.join()
+    return requests / (time.perf_counter() - start)
+
+
+@benchmark
+def thread_scaling():
+    """Throughput of get_object hits from 1 to 32 threads, single vs sharded pool."""
+    gil = getattr(sys, '_is_gil_enabled', lambda: True)()
+    print(f'GIL enabled: {gil} (threads only scale on free-threaded builds)')
+    for policy in ('unbounded', 'LRU'):
+        capacity = 2048 if policy == 'LRU' else None
+        pools = {
+            'ObjectsPool': ObjectsPool(lambda key: [key], capacity=capacity, thread_safe=True),
+            'ShardedObjectsPool': ShardedObjectsPool(lambda key: [key], capacity=capacity),
+        }
+        print(f'{policy} ({len(pools["ShardedObjectsPool"].shards)} shards)')
+        for label, pool in pools.items():
+            for key in range(1024):
+                pool.get_object(key)
+            rates = {
+                threads: max(throughput(pool.get_object, threads) for _ in range(3))
+                for threads in (1, 2, 4, 8, 16, 32)
+            }
+            scaling = ', '.join(f'{n}: x{rate / rates[1]:.1f}' for n, rate in rates.items())
+            print(f'  {label:<20} {rates[1] / 1e6:.2f} M req/s (1 thread), scaling {scaling}')
+
+
+def main(names) -> None:
+    for name in names or BENCHMARKS:
+        print(f'== {name} ==')
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,265 @@
+"""Micro benchmarks of the Notification-Listener (Subject) implementation.
+
+Run with: python benchmarks/bench_notification.py [benchmark-name ...]
+
+Each benchmark prints the best (per operation) latency, out of a few repeats,
+of the compared implementations.
+"""
+
+import asyncio
+import copy
+import inspect
+import sys
+import timeit
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict
+
+from software_patterns import Observer, Subject
+from software_patterns.notification import Dispatcher
+
+BENCHMARKS: Dict[str, Callable[[], None]] = {}
+
+
+def benchmark(function: Callable[[], None]) -> Callable[[], None]:
+    BENCHMARKS[function.__name__] = function
+    return function
+
+
+def report(label: str, statement: Callable[[], object], number: int = 2_000) -> float:
+    best = min(timeit.repeat(statement, number=number, repeat=5)) / number
+    print(f'  {label:<40} {best * 1e9:>10.1f} ns/op')
+    return best
+
+
+class TopicFilteringObserver(Observer):
+    """Reacts to the events of one topic, ignoring the broadcast of any other."""
+
+    def __init__(self, topic):
+        self.topic = topic
+        self.handled = 0
+
+    def update(self, subject):
+        if subject.state == self.topic:
+            self.handled += 1
+
+
+@benchmark
+def topic_dispatch():
+    """Per-event latency of notifying the observers of one topic, among many."""
+    for observers, topics in ((100, 10), (500, 50), (2000, 100)):
+        print(f'{observers} observers, over {topics} topics')
+        broadcaster = Subject()
+        topic_subject = Subject()
+        for index in range(observers):
+            topic = index % topics
+            broadcaster.attach(TopicFilteringObserver(topic))
+            topic_subject.attach(TopicFilteringObserver(topic), topics=[topic])
+        broadcaster.state = topic_subject.state = 3
+
+        broadcast = report('list broadcast, observers filter', broadcaster.notify)
+        indexed = report('topic index', lambda: topic_subject.notify(topic=3))
+        print(f'  speedup: x{broadcast / indexed:.2f}')
+
+
+@benchmark
+def subscription_churn():
+    """Latency of attaching and detaching an observer, among many attached ones."""
+    for observers in (100, 1000, 10000):
+        print(f'{observers} attached observers')
+        listeners = [TopicFilteringObserver(index) for index in range(observers)]
+        legacy_registry = list(listeners)
+        subject = Subject()
+        subject.add(*listeners)
+        churned = listeners[0]
+
+        def list_churn():
+            legacy_registry.remove(churned)
+            legacy_registry.append(churned)
+
+        def subject_churn():
+            subject.detach(churned)
+            subject.attach(churned)
+
+        legacy = report('list (legacy)', list_churn)
+        churn = report('Subject', subject_churn)
+        print(f'  speedup: x{legacy / churn:.2f}')
+
+
+class SyncObserver:
+    def update(self, subject):
+        pass
+
+
+class AsyncObserver:
+    async def update(self, subject):
+        pass
+
+
+def legacy_notify(observers, subject):
+    """Subject.notify, before the dispatch table: looks up each 'update' method."""
+    for observer in observers:
+        observer.update(subject)
+
+
+async def legacy_notify_async(observers, subject):
+    """Subject.notify_async, before the dispatch table: classifies each observer."""
+    tasks = []
+    for observer in observers:
+        update = getattr(observer, 'update', None)
+        if update is None:
+            continue
+        if inspect.iscoroutinefunction(update):
+            tasks.append(update(subject))
+        else:
+            update(subject)
+    if tasks:
+        await asyncio.gather(*tasks)
+
+
+@benchmark
+def dispatch():
+    """Per-event latency of notifying 1000 observers (half of them async)."""
+    sync_observers = [SyncObserver() for _ in range(1000)]
+    subject = Subject()
+    subject.add(*sync_observers)
+    print('notify, 1000 sync observers')
+    legacy = report(
+        'lookup per observer (legacy)', lambda: legacy_notify(sync_observers, subject)
+    )
+    table = report('dispatch table', subject.notify)
+    print(f'  speedup: x{legacy / table:.2f}')
+
+    mixed_observers = [(SyncObserver, AsyncObserver)[index % 2]() for index in range(1000)]
+    subject = Subject()
+    subject.add(*mixed_observers)
+    loop = asyncio.new_event_loop()
+    print('notify_async, 500 sync and 500 async observers')
+    legacy = report(
+        'classification per observer (legacy)',
+        lambda: loop.run_until_complete(legacy_notify_async(mixed_observers, subject)),
+        number=50,
+    )
+    table = report(
+        'dispatch table',
+        lambda: loop.run_until_complete(subject.notify_async()),
+        number=50,
+    )
+    print(f'  speedup: x{legacy / table:.2f}')
+    loop.close()
+
+
+class WorkingObserver:
+    """Does some work per notification, ie formatting a log record."""
+
+    def update(self, subject):
+        '-'.join(str(number) for number in range(50))
+
+
+@benchmark
+def queued_dispatch():
+    """Latency of notify, on the notifying thread, with 10 (working) observers."""
+    subject = Subject()
+    subject.add(*[WorkingObserver() for _ in range(10)])
+    inline = report('inline', subject.notify)
+    dispatcher = Dispatcher(max_queue=1_000_000)
+    queued_subject = Subject(dispatcher=dispatcher)
+    queued_subject.add(*[WorkingObserver() for _ in range(10)])
+    queued = report('queued (dispatcher thread)', queued_subject.notify)
+    dispatcher.close()
+    print(f'  speedup: x{inline / queued:.2f}')
+
+
+class CopyingObserver:
+    """Deep-copies the state, to keep a consistent view of it (legacy workaround)."""
+
+    def update(self, subject):
+        copy.deepcopy(subject.state)
+
+
+class EventObserver:
+    def update(self, event):
+        event.state
+
+
+@benchmark
+def event_snapshots():
+    """Per-event latency of giving 100 observers a consistent view of the state."""
+    state = {'progress': 42, 'stage': 'download', 'files': ['a', 'b', 'c']}
+    copying_subject = Subject()
+    copying_subject.add(*[CopyingObserver() for _ in range(100)])
+    copying_subject.state = state
+    event_subject = Subject(events=True)
+    event_subject.add(*[EventObserver() for _ in range(100)])
+    event_subject.state = state
+    copies = report('deep copy per observer (legacy)', copying_subject.notify)
+    events = report('shared immutable event', event_subject.notify)
+    print(f'  speedup: x{copies / events:.2f}')
+
+
+@benchmark
+def priority_dispatch():
+    """Per-notify cost of notifying 100 observers (of 10 priorities) in priority order."""
+    observers = [SyncObserver() for _ in range(100)]
+    priorities = {observer: index % 10 for index, observer in enumerate(observers)}
+
+    def sort_per_notify():
+        # legacy workaround: order the observers on every notification
+        for observer in sorted(observers, key=priorities.__getitem__, reverse=True):
+            observer.update(subject)
+
+    subject = Subject()
+    for observer in observers:
+        subject.attach(observer, priority=priorities[observer])
+    sorted_ = report('sorted per notify (legacy)', sort_per_notify)
+    cached = report('cached priority order', subject.notify)
+    print(f'  speedup: x{sorted_ / cached:.2f}')
+
+
+class ScoringObserver:
+    """Does CPU-bound work (re-scoring the state) when notified."""
+
+    def update(self, event):
+        return sum(value * value for value in event.state[:200_000:4])
+
+
+async def pickled_per_observer(processes, observers, event):
+    """Legacy workaround: submit each observer to the pool, pickling the event each time."""
+    loop = asyncio.get_running_loop()
+    await asyncio.gather(
+        *[loop.run_in_executor(processes, observer.update, event) for observer in observers]
+    )
+
+
+@benchmark
+def process_fan_out():
+    """Per-event latency of notifying 4 CPU-bound observers of a 4 MB state."""
+    observers = [ScoringObserver() for _ in range(4)]
+    subject = Subject(events=True)
+    subject.add(*observers, cpu_bound=True)
+    subject.state = bytes(range(256)) * (4 * 4096)
+    event = subject._payload(None)
+    inline = report('inline (notify)', subject.notify, number=5)
+    with ProcessPoolExecutor(max_workers=4) as processes:
+        pickled = report(
+            'pickled per observer (legacy)',
+            lambda: asyncio.run(pickled_per_observer(processes, observers, event)),
+            number=5,
+        )
+        shared = report(
+            'processes, shared memory',
+            lambda: asyncio.run(subject.notify_async(processes=processes)),
+            number=5,
+        )
+    print(
+        f'  speedup: x{inline / shared:.2f} (vs inline), x{pickled / shared:.2f} (vs legacy)'
+    )
+
+
+def main(names) -> None:
+    for name in names or BENCHMARKS:
+        print(f'== {name} ==')
+        BENCHMARKS[name]()
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -22,12 +22,75 @@ had been attached/subscribed to.
 This module also provides the concrete Subject class, serving with methods to
 subscribe/unsubscribe (attach/detach) observers and also with a method to
 "notify" all Observers.
+
+Observers can also be attached weakly, so that they are detached once garbage
+collected, instead of being kept alive by the Subject.
+
+Observers can receive an immutable Event (the state at the time of the
+notification), instead of the Subject itself, which may have changed by the
+time they handle the notification.
+
+Notifications can also be delivered by background threads (see Dispatcher),
+so that notifying does not wait for the observers.
+
+Observers doing CPU-bound work can be notified in other processes (ie by a
+ProcessPoolExecutor), receiving events pickled once per notification, or
+passed through shared memory if large (see Subject.notify_async).
+
+Observers can be wrapped to be notified at a limited rate, receiving only the
+latest (or merged) state of rapid notifications (see Debounced, Throttled and
+TickCoalesced).
+
+Observers can also subscribe to specific topics (ie event types), so that
+notifying about a topic only reaches the observers interested in it.
 """
 
+import asyncio
+import copy
+import functools
+import inspect
+import itertools
+import logging
+import pickle
+import sys
+import threading
+import time
+import weakref
 from abc import ABC, abstractmethod
-from typing import Generic, List, TypeVar, Union
+from collections import deque, namedtuple
+from concurrent.futures import Executor
+from multiprocessing import resource_tracker, shared_memory
+from typing import (
+    Any,
+    Callable,
+    Deque,
+    Dict,
+    Generic,
+    Hashable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    TypeVar,
+    Union,
+)
 
-__all__ = ['Subject', 'Observer']
+__all__ = [
+    'Subject',
+    'Observer',
+    'NotificationResult',
+    'Delivery',
+    'Event',
+    'Dispatcher',
+    'Debounced',
+    'Throttled',
+    'TickCoalesced',
+    'StopPropagation',
+]
+
+logger = logging.getLogger(__name__)
 
 
 T = TypeVar('T')
@@ -83,6 +146,242 @@ class AddObserversResult:
         self.failed = failed
 
 
+class Event:
+    """Immutable notification of a Subject's state, shared by all the observers.
+
+    Captured once per notification, so that every observer gets a consistent
+    view of the state, however late it handles the notification. The state
+    itself is referenced, not copied, so the subject's state should be replaced
+    (ie subject.state = new_state), rather than mutated in place.
+
+    Args:
+        state (Any): the state of the subject, when notifying
+        sequence (int): the number of the notification (starting from 1)
+        timestamp (float): the time of the notification, in seconds since the
+            epoch
+        topic (Optional[Hashable], optional): the topic of the notification.
+            Defaults to None.
+    """
+
+    __slots__ = ('state', 'sequence', 'timestamp', 'topic')
+
+    state: Any
+    sequence: int
+    timestamp: float
+    topic: Optional[Hashable]
+
+    def __init__(
+        self, state: Any, sequence: int, timestamp: float, topic: Optional[Hashable] = None
+    ):
+        object.__setattr__(self, 'state', state)
+        object.__setattr__(self, 'sequence', sequence)
+        object.__setattr__(self, 'timestamp', timestamp)
+        object.__setattr__(self, 'topic', topic)
+
+    def __setattr__(self, name: str, value: Any) -> None:
+        raise AttributeError(f"Cannot set '{name}': events are immutable.")
+
+    def __delattr__(self, name: str) -> None:
+        raise AttributeError(f"Cannot delete '{name}': events are immutable.")
+
+    def replace(self, **changes: Any) -> 'Event':
+        """Return a new event, with some of the attributes changed."""
+        attributes = {name: getattr(self, name) for name in self.__slots__}
+        attributes.update(changes)
+        return Event(**attributes)
+
+    def __reduce__(self) -> Tuple[Any, ...]:
+        # unpickled through the constructor, since attributes cannot be set
+        return (Event, (self.state, self.sequence, self.timestamp, self.topic))
+
+    def __repr__(self) -> str:
+        return (
+            f'Event(state={self.state!r}, sequence={self.sequence}, '
+            f'timestamp={self.timestamp}, topic={self.topic!r})'
+        )
+
+
+Delivery = namedtuple('Delivery', ['observer', 'latency', 'error', 'result'])
+
+
+class NotificationResult:
+    """Result of notifying observers asynchronously: the delivery to each observer.
+
+    Each delivery holds the observer, the seconds it took to handle the
+    notification, its error (None if it succeeded) and what its 'update'
+    method returned (None if it failed).
+    """
+
+    def __init__(self, deliveries: List[Delivery]):
+        self.deliveries = deliveries
+
+    @property
+    def failed(self) -> List[Delivery]:
+        """The deliveries that failed."""
+        return [delivery for delivery in self.deliveries if delivery.error is not None]
+
+
+# an observer (or its weak stand-in), its topics (None for all), its bound
+# 'update' method, whether it is a coroutine function, its priority and
+# whether it is CPU-bound
+_Subscription = Tuple[Any, Optional[Tuple[Hashable, ...]], Callable[..., Any], bool, int, bool]
+
+# the observers and their subscriptions, to notify about a topic
+_DispatchTable = Tuple[Tuple[Any, ...], Tuple[_Subscription, ...]]
+
+# keys of the dispatch tables of broadcasts and of topics without dedicated observers
+_BROADCAST = object()
+_WILDCARDS = object()
+
+
+def _ignore(*args, **kwargs) -> None:
+    pass
+
+
+def _descending_priority(subscription: _Subscription) -> int:
+    return -subscription[4]
+
+
+def _method_key(observer: Any) -> Hashable:
+    """Registry key of an observer, weakly attached by its bound 'update' method."""
+    method = getattr(observer, 'update', None)
+    return id(getattr(method, '__self__', None)), getattr(method, '__func__', None)
+
+
+class _WeakObserver:
+    """Stands in for a weakly attached observer, in the registry of a Subject.
+
+    Registered under the identity of the observer, or of the bound 'update'
+    method it is referenced by (since the observer itself may not outlive it).
+    """
+
+    __slots__ = ('_reference', '_by_method', 'key', '__weakref__')
+
+    def __init__(self, observer: ObserverInterface, collected: Callable[[Any], None]):
+        self._reference: Any
+        self.key: Hashable
+        try:
+            self._reference = weakref.ref(observer, collected)
+            self._by_method = False
+            self.key = id(observer)
+        except TypeError:
+            # ie a namedtuple composing the bound method of an object
+            self._reference = weakref.WeakMethod(observer.update, collected)  # type: ignore[arg-type]
+            self._by_method = True
+            self.key = _method_key(observer)
+
+    @property
+    def observer(self) -> Any:
+        """The observer, or its 'update' method if referenced by it (None once collected)."""
+        return self._reference()
+
+    @property
+    def update(self) -> Callable[..., Any]:
+        """The observer's 'update' method, or a no-op once it is garbage collected."""
+        referent = self._reference()
+        if referent is None:
+            return _ignore
+        return referent if self._by_method else referent.update
+
+    def call(self, *args, **kwargs) -> Any:
+        return self.update(*args, **kwargs)
+
+    async def call_async(self, *args, **kwargs) -> Any:
+        result = self.update(*args, **kwargs)
+        if result is not None:  # unless garbage collected
+            return await result
+
+
+# pickled payloads at least this large (in bytes) are passed through shared memory
+_SHARED_MEMORY_THRESHOLD = 64 * 1024
+
+
+class _Parcel:
+    """A notification's payload, pickled once for all the observers notified in processes.
+
+    Large payloads are written to a shared memory segment, so that only its
+    name is sent (pickled) to the process of each observer.
+    """
+
+    def __init__(self, payload: Any):
+        data = pickle.dumps(payload, pickle.HIGHEST_PROTOCOL)
+        self.size = len(data)
+        self.data: Optional[bytes] = data
+        self.name: Optional[str] = None
+        self._segment: Optional[shared_memory.SharedMemory] = None
+        if self.size >= _SHARED_MEMORY_THRESHOLD:
+            segment: Any = shared_memory.SharedMemory(create=True, size=self.size)
+            segment.buf[: self.size] = data
+            self.data, self.name, self._segment = None, segment.name, segment
+        # the tracker unlinking the segment, if this process exits before releasing it
+        self.tracker = None if sys.version_info >= (3, 13) else _tracker_pid()
+
+    def __getstate__(self) -> Tuple[Any, ...]:
+        return self.data, self.name, self.size, self.tracker
+
+    def __setstate__(self, state: Tuple[Any, ...]) -> None:
+        self.data, self.name, self.size, self.tracker = state
+        self._segment = None
+
+    def open(self) -> Any:
+        """Unpickle the payload, in the process of an observer."""
+        if self.data is not None:
+            return pickle.loads(self.data)
+        segment = self._attach()
+        try:
+            with segment.buf[: self.size] as view:
+                return pickle.loads(view)
+        finally:
+            segment.close()
+
+    def release(self) -> None:
+        """Unlink the shared memory segment (if any), once all observers are notified."""
+        if self._segment is not None:
+            self._segment.close()
+            self._segment.unlink()
+            self._segment = None
+
+    def _attach(self) -> Any:
+        """Attach to the shared memory segment, leaving its unlinking to the owner."""
+        if sys.version_info >= (3, 13):
+            return shared_memory.SharedMemory(name=self.name, track=False)
+        # attaching registers the segment with the resource tracker of this process,
+        # which unlinks it when the process exits, unless it is the owner's tracker
+        # (shared by forked processes), from which the owner's 'unlink' unregisters it
+        segment: Any = shared_memory.SharedMemory(name=self.name)
+        tracker = _tracker_pid()
+        if tracker is not None and tracker != self.tracker:
+            # under the (private) name the segment was registered with
+            resource_tracker.unregister(segment._name, 'shared_memory')
+        return segment
+
+
+def _tracker_pid() -> Optional[int]:
+    """The process id of the resource tracker this process started, if known.
+
+    Python < 3.13 has no public way to attach to a shared memory segment
+    untracked, so this reads a private attribute of the resource tracker. If
+    it is missing, None is returned and attached segments stay registered.
+    """
+    return getattr(getattr(resource_tracker, '_resource_tracker', None), '_pid', None)
+
+
+def _gathered(observer: Any, task: 'asyncio.Task[Any]', latency: float) -> 'Delivery':
+    """The delivery to an async observer, out of its (done) task."""
+    error = task.exception()
+    if error is None:
+        return Delivery(observer, latency, None, task.result())
+    if isinstance(error, StopPropagation):
+        # too late to stop the other observers, which are notified concurrently
+        return Delivery(observer, latency, None, None)
+    return Delivery(observer, latency, error, None)
+
+
+def _update_in_process(observer: Any, parcel: _Parcel) -> Any:
+    """Notify (a copy of) an observer in the process of a pool, returning the result."""
+    return observer.update(parcel.open())
+
+
 class Subject(SubjectInterface, Generic[T]):
     import asyncio
     import inspect
@@ -95,9 +394,19 @@ class Subject(SubjectInterface, Generic[T]):
     Both the _state and _observers attributes have a simple implementation,
     but can be overrode to accommodate for more complex scenarios.
 
-    The observers/subscribers are implemented as a python list.
-    In more complex scenarios, the list of subscribers can
-    be stored more comprehensively (categorized by event type, etc.).
+    The observers/subscribers are implemented as an insertion ordered dict
+    (notified in the order they were attached), so that attaching and detaching
+    observers costs O(1), regardless of their number. Observers can
+    also be attached to specific topics, which are indexed in a dict of the
+    observers interested in each topic, so that notifying about a topic costs
+    in proportion to the interested observers only.
+
+    Each observer's bound 'update' method, and whether it is a coroutine
+    function, are resolved when attached. Notifications iterate a (tuple)
+    dispatch table of the observers to notify about a topic, built on first
+    use and discarded when an observer is attached or detached; that table is
+    also the snapshot an ongoing notification keeps iterating, if observers
+    are attached or detached meanwhile.
 
     The subscription management methods provided are 'attach', 'detach' (as in
     the SubjectInterface) and 'add', which attached multiple observers at once.
@@ -134,42 +443,600 @@ class Subject(SubjectInterface, Generic[T]):
         >>> broadcaster.state = 'event-object-B'
         >>> broadcaster.notify()
         observer-type-a reacts to event event-object-B
+
+    Observers attached to topics only receive the notifications about them (and
+    the broadcasts), while observers attached without topics receive all:
+
+        >>> broadcaster.attach(subscriber_2, topics=['orders'])
+
+        >>> broadcaster.state = 'order-created'
+        >>> broadcaster.notify(topic='orders')
+        observer-type-a reacts to event order-created
+        observer-type-b reacts to event order-created
+
+        >>> broadcaster.state = 'user-created'
+        >>> broadcaster.notify(topic='users')
+        observer-type-a reacts to event user-created
+
+    Observers with a higher priority are notified first, and an observer may
+    raise StopPropagation to stop notifying the ones after it:
+
+        >>> class Guard(Observer):
+        ...  def update(self, *args, **kwargs):
+        ...   print('guard handles the event')
+        ...   raise StopPropagation
+
+        >>> broadcaster.attach(Guard(), priority=10)
+        >>> broadcaster.notify()
+        guard handles the event
     """
 
-    def __init__(self, *args, **kwargs):
-        self._observers: List[ObserverInterface] = []
+    def __init__(
+        self, *args, dispatcher: Optional['Dispatcher'] = None, events: bool = False, **kwargs
+    ):
+        # insertion ordered dicts (used as ordered sets), for O(1) attach and detach,
+        # keyed by the identity of the observers (see 'attach')
+        self._observers: Dict[Hashable, _Subscription] = {}
+        # observers attached without topics, which are interested in all of them
+        self._wildcards: Dict[Hashable, None] = {}
+        # the observers interested in each topic (including the wildcards), in attach order
+        self._topics: Dict[Hashable, Dict[Hashable, None]] = {}
+        # the subscriptions to notify, per topic, in notification order
+        self._dispatch: Dict[Hashable, _DispatchTable] = {}
+        # number of observers attached with a (non default) priority
+        self._prioritized = 0
+        # weakly attached observers, garbage collected since the last pruning
+        self._collected: List[_WeakObserver] = []
+        self._dispatcher = dispatcher
+        # numbers the events, if observers are notified with events
+        self._sequence: Optional[Iterator[int]] = itertools.count(1) if events else None
         self._state = StateVariableType
 
-    def attach(self, observer: ObserverInterface) -> None:
+    def attach(
+        self,
+        observer: ObserverInterface,
+        topics: Optional[Iterable[Hashable]] = None,
+        weak: bool = False,
+        priority: int = 0,
+        cpu_bound: bool = False,
+    ) -> None:
+        """Attach an observer, to all topics or only to the given ones.
+
+        Attaching an already attached observer does not subscribe it twice;
+        it only subscribes it to the given topics it was not interested in
+        (keeping the priority and CPU-bound marking it was first attached with).
+
+        Observers are notified in descending priority and, among equal
+        priorities, in attach order. The order is computed once per topic and
+        cached, until the observers change.
+
+        Observers are registered by identity, so they need not be hashable, and
+        equal but distinct observers are attached separately. Their 'update'
+        method is resolved once, when first attached, for 'notify_async'.
+
+        Weakly attached observers are not kept alive by the subject: once
+        garbage collected, they are no longer notified and are detached
+        automatically. Observers that do not support weak references (ie a
+        namedtuple composing a bound method) are instead detached once the
+        object of their bound 'update' method is garbage collected.
+
+        Args:
+            observer (ObserverInterface): the observer to subscribe
+            topics (Optional[Iterable[Hashable]], optional): the topics the
+                observer is interested in. Defaults to None, meaning all topics.
+            weak (bool, optional): whether to hold the observer by a weak
+                reference. Defaults to False.
+            priority (int, optional): observers with higher priority are
+                notified first. Defaults to 0.
+            cpu_bound (bool, optional): whether the observer does CPU-bound
+                work, to be notified in another process by 'notify_async' (if
+                given processes). Such observers must be picklable, have a sync
+                'update' method and be attached (strongly) to a subject created
+                with events=True. Defaults to False.
+        """
         # Early fail if observer does not have an 'update' callable
         if not callable(getattr(observer, 'update', None)):
             raise TypeError(
                 f"Attached observer {observer!r} does not have a callable 'update' method."
             )
-        self._observers.append(observer)
+        self._subscribe(
+            observer, None if topics is None else tuple(topics), weak, priority, cpu_bound
+        )
+
+    def _subscribe(
+        self,
+        observer: ObserverInterface,
+        topics: Optional[Tuple[Hashable, ...]],
+        weak: bool,
+        priority: int = 0,
+        cpu_bound: bool = False,
+    ) -> None:
+        if self._collected:
+            self._prune()
+        self._dispatch.clear()
+        key = self._key(observer)
+        if key in self._observers:
+            entry, current, update, is_async, priority, cpu_bound = self._observers[key]
+            if current is None:
+                return  # already interested in all topics
+        else:
+            update = observer.update
+            is_async = self.inspect.iscoroutinefunction(update)
+            if cpu_bound:
+                self._check_cpu_bound(observer, weak, is_async)
+            entry, current = observer, ()
+            if weak:
+                entry = self._weakly(observer)
+                key = entry.key
+                # the stand-in resolves the method, not to keep the observer alive
+                update = entry.call_async if is_async else entry.call
+            if priority:
+                self._prioritized += 1
+        if topics is None:
+            for topic in current:
+                self._unsubscribe(key, topic)
+            self._observers[key] = (entry, None, update, is_async, priority, cpu_bound)
+            self._index(self._wildcards, key)
+            for observers in self._topics.values():
+                self._index(observers, key)
+            return
+        self._observers[key] = (
+            entry,
+            tuple(dict.fromkeys(current + topics)),
+            update,
+            is_async,
+            priority,
+            cpu_bound,
+        )
+        for topic in topics:
+            interested = self._topics.get(topic)
+            if interested is None:
+                interested = self._topics[topic] = dict(self._wildcards)
+            self._index(interested, key)
+
+    def _index(self, observers: Dict[Hashable, None], key: Hashable) -> None:
+        """Add an observer to an index (of a topic or the wildcards), keeping the attach order."""
+        if key in observers:
+            return
+        observers[key] = None
+        if next(reversed(self._observers)) != key:
+            # attached before (to other topics): goes where it was attached, not last
+            ordered = [other for other in self._observers if other in observers]
+            observers.clear()
+            observers.update(dict.fromkeys(ordered))
+
+    def _check_cpu_bound(
+        self, observer: ObserverInterface, weak: bool, is_async: bool
+    ) -> None:
+        """Fail early, if an observer cannot be notified in another process."""
+        if weak:
+            raise ValueError(f"CPU-bound observer {observer!r} cannot be attached weakly.")
+        if is_async:
+            raise ValueError(
+                f"CPU-bound observer {observer!r} must have a sync 'update' method."
+            )
+        if self._sequence is None:
+            raise ValueError(
+                'CPU-bound observers receive (picklable) events: create the subject '
+                'with events=True.'
+            )
+
+    def _weakly(self, observer: ObserverInterface) -> '_WeakObserver':
+        subject = weakref.ref(self)
+
+        def collected(_reference: Any) -> None:
+            alive_subject = subject()
+            if alive_subject is not None:
+                # only queued, since garbage collection may run in the middle of any operation
+                alive_subject._collected.append(entry)
+
+        entry = _WeakObserver(observer, collected)
+        return entry
+
+    def _key(self, observer: ObserverInterface) -> Hashable:
+        """Registry key of an observer: its identity (or of its method, if weakly attached by it)."""
+        key: Hashable = id(observer)
+        if key not in self._observers:
+            # ids are unique among live objects, but the observer may have been weakly
+            # attached by its method, since it cannot be weakly referenced (see _WeakObserver)
+            method_key = _method_key(observer)
+            if method_key in self._observers:
+                return method_key
+        return key
 
     def detach(self, observer: ObserverInterface) -> None:
-        self._observers.remove(observer)
+        if self._collected:
+            self._prune()
+        key = self._key(observer)
+        if key not in self._observers:
+            raise ValueError(f"Observer {observer!r} is not attached.")
+        self._remove(key)
 
-    def notify(self) -> None:
-        for observer in self._observers:
-            observer.update(self)
-
-    async def notify_async(self) -> None:
-        """Notify all observers, awaiting async ones and calling sync ones."""
-        tasks = []
-        for observer in self._observers:
-            update = getattr(observer, 'update', None)
-            if update is None:
-                continue
-            if self.inspect.iscoroutinefunction(update):
-                tasks.append(update(self))
+    def _remove(self, key: Hashable) -> None:
+        self._dispatch.clear()
+        _, topics, _, _, priority, _ = self._observers.pop(key)
+        if priority:
+            self._prioritized -= 1
+        if topics is None:
+            del self._wildcards[key]
+            for topic in list(self._topics):
+                self._unsubscribe(key, topic)
+        else:
+            for topic in topics:
+                self._unsubscribe(key, topic)
+
+    def _unsubscribe(self, key: Hashable, topic: Hashable) -> None:
+        interested = self._topics[topic]
+        interested.pop(key, None)
+        if len(interested) == len(self._wildcards):
+            # only the wildcards are left, which need no dedicated index
+            del self._topics[topic]
+
+    def _prune(self) -> None:
+        """Detach the weakly attached observers, which were garbage collected."""
+        collected, self._collected = self._collected, []
+        for entry in collected:
+            subscription = self._observers.get(entry.key)
+            # unless already detached (and the key reused by another observer)
+            if subscription is not None and subscription[0] is entry:
+                self._remove(entry.key)
+
+    def _dispatch_table(self, topic: Optional[Hashable]) -> _DispatchTable:
+        """The observers (and subscriptions) to notify about a topic, in notification order."""
+        if self._collected:
+            self._prune()
+        key: Hashable = _BROADCAST if topic is None else topic
+        table = self._dispatch.get(key)
+        if table is not None:
+            return table
+        if topic is None:
+            entries: Iterable[Hashable] = self._observers
+        elif topic in self._topics:
+            entries = self._topics[topic]
+        else:
+            # topics without dedicated observers share the table of the wildcards
+            key = _WILDCARDS
+            table = self._dispatch.get(key)
+            if table is not None:
+                return table
+            entries = self._wildcards
+        subscriptions = [self._observers[key] for key in entries]
+        if self._prioritized:
+            # stable, so that equal priorities keep the attach order
+            subscriptions.sort(key=_descending_priority)
+        table = self._dispatch[key] = (
+            tuple(subscription[0] for subscription in subscriptions),
+            tuple(subscriptions),
+        )
+        return table
+
+    def notify(self, topic: Optional[Hashable] = None) -> None:
+        """Notify the observers of a topic, or all of them (broadcast).
+
+        Observers may be attached or detached while notified; the ongoing
+        notification still reaches the observers interested at its start.
+
+        If the subject has a dispatcher, the notification is only enqueued, to
+        be delivered by the dispatcher's threads (see Dispatcher).
+
+        Observers receive the subject, or a single (immutable) Event shared by
+        all of them, if the subject was created with events=True.
+
+        An observer raising StopPropagation consumes the notification: the
+        observers after it (with lower priority) are not notified.
+
+        Args:
+            topic (Optional[Hashable], optional): the topic of the notification.
+                Defaults to None, meaning all observers are notified.
+        """
+        payload = self._payload(topic)
+        if self._dispatcher is not None:
+            # deliver a snapshot, since the subject may change until delivered
+            snapshot = copy.copy(self) if payload is self else payload
+            self._dispatcher.submit(self, snapshot, self._dispatch_table(topic)[0])
+            return
+        # calling 'update' through the observer is faster than a stored bound method
+        try:
+            for observer in self._dispatch_table(topic)[0]:
+                observer.update(payload)
+        except StopPropagation:
+            pass
+
+    def _payload(self, topic: Optional[Hashable]) -> Any:
+        """What observers receive: the subject itself, or an Event (if enabled)."""
+        if self._sequence is None:
+            return self
+        return Event(self._state, next(self._sequence), time.time(), topic)
+
+    async def notify_async(
+        self,
+        topic: Optional[Hashable] = None,
+        max_concurrency: Optional[int] = None,
+        timeout: Optional[float] = None,
+        executor: Optional[Executor] = None,
+        errors: str = 'raise',
+        processes: Optional[Executor] = None,
+    ) -> 'NotificationResult':
+        """Notify the observers (of a topic), awaiting async ones and calling sync ones.
+
+        Async observers run concurrently, while sync observers are called in
+        order, on the event loop (unless an executor is given, to run them
+        concurrently in its threads, without blocking the loop).
+
+        A sync observer called on the event loop may raise StopPropagation, so
+        that the observers after it are not notified. Raised by a concurrently
+        notified observer, it only ends its own delivery (successfully), since
+        the observers after it are already notified.
+
+        A failing observer does not hinder the others: by default, all observers
+        are notified and then the first error (in notification order) is raised.
+        With errors='cancel' the first error is raised at once, cancelling the
+        ongoing deliveries, while with errors='report' no error is raised and
+        the errors are only reported in the result.
+
+        Observers attached as CPU-bound are notified concurrently in other
+        processes, if given an executor of processes (ie a ProcessPoolExecutor),
+        so that their work is not serialised by the GIL. Each process notifies
+        a (pickled) copy of the observer, so changes to the observer are lost:
+        what its 'update' method returns is gathered in the result instead.
+        The event is pickled once per notification and, if large, passed to
+        the processes through shared memory, instead of pickled per observer.
+
+        Example:
+
+            >>> import asyncio
+            >>> from software_patterns import Subject
+
+            >>> class SlowObserver:
+            ...  async def update(self, subject):
+            ...   await asyncio.sleep(1)
+
+            >>> class FastObserver:
+            ...  async def update(self, subject):
+            ...   pass
+
+            >>> subject = Subject()
+            >>> _ = subject.add(SlowObserver(), FastObserver())
+            >>> result = asyncio.run(subject.notify_async(timeout=0.01, errors='report'))
+            >>> [type(delivery.error).__name__ for delivery in result.deliveries]
+            ['TimeoutError', 'NoneType']
+
+        Args:
+            topic (Optional[Hashable], optional): the topic of the notification.
+                Defaults to None, meaning all observers are notified.
+            max_concurrency (Optional[int], optional): maximum number of
+                observers notified concurrently. Defaults to None, meaning no
+                limit.
+            timeout (Optional[float], optional): seconds to wait for each
+                (concurrently notified) observer, before failing its delivery
+                with a TimeoutError. Defaults to None, meaning no timeout.
+            executor (Optional[Executor], optional): runs the sync observers.
+                Defaults to None, meaning they are called on the event loop.
+            errors (str, optional): 'raise', 'cancel' or 'report'; what to do
+                when observers fail. Defaults to 'raise', meaning the first
+                error is raised once all observers are notified.
+            processes (Optional[Executor], optional): runs the CPU-bound
+                observers, in other processes. Defaults to None, meaning they
+                are notified as the other sync observers.
+
+        Returns:
+            NotificationResult: the delivery to each observer, in notification
+            order, with its latency, error (if any) and result
+        """
+        if errors not in ('raise', 'cancel', 'report'):
+            raise ValueError(f"Expected errors 'raise', 'cancel' or 'report', got {errors!r}.")
+        fail_fast = errors == 'cancel'
+        if (
+            timeout is None
+            and max_concurrency is None
+            and executor is None
+            and processes is None
+            and not fail_fast
+        ):
+            result = await self._notify_gathering(self._payload(topic), topic)
+        else:
+            result = await self._notify_delivering(
+                topic, max_concurrency, timeout, executor, fail_fast, processes
+            )
+        if errors == 'raise' and result.failed:
+            raise result.failed[0].error
+        return result
+
+    async def _notify_gathering(
+        self, payload: Any, topic: Optional[Hashable]
+    ) -> 'NotificationResult':
+        """Notify the observers, gathering the coroutines of async ones directly.
+
+        The fast path, without timeouts, concurrency limits or executors: there
+        is no wrapper coroutine per observer, since the latency of each async
+        observer is measured once its task is done.
+        """
+        perf_counter = time.perf_counter
+        deliveries: List[Any] = []
+        coroutines: List[Any] = []
+        observers: List[Any] = []  # the async ones
+        try:
+            for observer, _, update, is_async, _, _ in self._dispatch_table(topic)[1]:
+                if type(observer) is _WeakObserver:
+                    observer = observer.observer  # reported instead of its stand-in
+                if is_async:
+                    coroutines.append(update(payload))
+                    observers.append(observer)
+                    deliveries.append(None)  # filled in once its task is done
+                    continue
+                start = perf_counter()
+                try:
+                    result = update(payload)
+                except StopPropagation:
+                    deliveries.append(Delivery(observer, perf_counter() - start, None, None))
+                    break  # the observers after it are not notified
+                except Exception as error:
+                    deliveries.append(Delivery(observer, perf_counter() - start, error, None))
+                else:
+                    deliveries.append(Delivery(observer, perf_counter() - start, None, result))
+        except BaseException:
+            for coroutine in coroutines:
+                coroutine.close()  # never awaited
+            raise
+        if coroutines:
+            loop = self.asyncio.get_running_loop()
+            # instead of gather, a single callback per task also records when it is done
+            ended: Dict[Any, float] = {}
+            all_done = loop.create_future()
+
+            def end(task: Any) -> None:
+                ended[task] = perf_counter()
+                if len(ended) == len(tasks) and not all_done.done():
+                    all_done.set_result(None)
+
+            start = perf_counter()
+            tasks = [loop.create_task(coroutine) for coroutine in coroutines]
+            for task in tasks:
+                task.add_done_callback(end)
+            try:
+                await all_done
+            except BaseException:  # ie cancelled: the deliveries are no longer awaited
+                for task in tasks:
+                    task.cancel()
+                raise
+            outcomes = iter(zip(observers, tasks))
+            for index, delivery in enumerate(deliveries):
+                if delivery is None:
+                    observer, task = next(outcomes)
+                    deliveries[index] = _gathered(observer, task, ended[task] - start)
+        return NotificationResult(deliveries)
+
+    async def _notify_delivering(
+        self,
+        topic: Optional[Hashable],
+        max_concurrency: Optional[int],
+        timeout: Optional[float],
+        executor: Optional[Executor],
+        fail_fast: bool,
+        processes: Optional[Executor],
+    ) -> 'NotificationResult':
+        """Notify the observers, wrapping each concurrent delivery in a task."""
+        loop = self.asyncio.get_running_loop()
+        semaphore = (
+            None if max_concurrency is None else self.asyncio.Semaphore(max_concurrency)
+        )
+        deliveries: List[Any] = []
+        tasks: List['asyncio.Task[Delivery]'] = []
+        payload = self._payload(topic)
+        parcel: Optional[_Parcel] = None
+        try:
+            for observer, _, update, is_async, _, cpu_bound in self._dispatch_table(topic)[1]:
+                if type(observer) is _WeakObserver:
+                    observer = observer.observer  # reported instead of its stand-in
+                if cpu_bound and processes is not None:
+                    if parcel is None:
+                        parcel = _Parcel(payload)
+                    tasks.append(
+                        loop.create_task(
+                            self._deliver(
+                                observer,
+                                functools.partial(_update_in_process, observer),
+                                parcel,
+                                processes,
+                                semaphore,
+                                timeout,
+                                fail_fast,
+                            )
+                        )
+                    )
+                    deliveries.append(None)
+                elif is_async or executor is not None:
+                    tasks.append(
+                        loop.create_task(
+                            self._deliver(
+                                observer,
+                                update,
+                                payload,
+                                None if is_async else executor,
+                                semaphore,
+                                timeout,
+                                fail_fast,
+                            )
+                        )
+                    )
+                    deliveries.append(None)  # filled in once the task is done
+                else:
+                    delivery, consumed = self._deliver_inline(
+                        observer, update, payload, fail_fast
+                    )
+                    deliveries.append(delivery)
+                    if consumed:
+                        break  # the observers after it are not notified
+            results = iter(await self.asyncio.gather(*tasks))
+        finally:
+            # on failure (or cancellation), the ongoing deliveries are no longer awaited
+            for task in tasks:
+                task.cancel()
+            if parcel is not None:
+                parcel.release()
+        return NotificationResult(
+            [next(results) if delivery is None else delivery for delivery in deliveries]
+        )
+
+    def _deliver_inline(
+        self, observer: Any, update: Callable[..., Any], payload: Any, fail_fast: bool
+    ) -> Tuple['Delivery', bool]:
+        """Call a sync observer, returning its delivery and whether it consumed the notification."""
+        start = time.perf_counter()
+        try:
+            result = update(payload)
+        except StopPropagation:
+            return Delivery(observer, time.perf_counter() - start, None, None), True
+        except Exception as error:
+            if fail_fast:
+                raise
+            return Delivery(observer, time.perf_counter() - start, error, None), False
+        return Delivery(observer, time.perf_counter() - start, None, result), False
+
+    async def _deliver(
+        self,
+        observer: Any,
+        update: Callable[..., Any],
+        payload: Any,
+        executor: Optional[Executor],
+        semaphore: Optional['asyncio.Semaphore'],
+        timeout: Optional[float],
+        fail_fast: bool,
+    ) -> 'Delivery':
+        if semaphore is not None:
+            async with semaphore:
+                return await self._deliver(
+                    observer, update, payload, executor, None, timeout, fail_fast
+                )
+        start = time.perf_counter()
+        result = None
+        try:
+            if executor is None:
+                awaitable = update(payload)
+            else:
+                awaitable = self.asyncio.get_running_loop().run_in_executor(
+                    executor, update, payload
+                )
+            if timeout is None:
+                result = await awaitable
             else:
-                update(self)
-        if tasks:
-            await self.asyncio.gather(*tasks)
+                result = await self.asyncio.wait_for(awaitable, timeout)
+        except StopPropagation:
+            pass  # too late to stop the other observers, which are notified concurrently
+        except Exception as error:
+            if fail_fast:
+                raise
+            return Delivery(observer, time.perf_counter() - start, error, None)
+        return Delivery(observer, time.perf_counter() - start, None, result)
 
-    def add(self, *observers):
+    def add(
+        self,
+        *observers,
+        topics: Optional[Iterable[Hashable]] = None,
+        weak: bool = False,
+        priority: int = 0,
+        cpu_bound: bool = False,
+    ):
         """Subscribe multiple observers at once. Returns AddObserversResult.
 
         In case some observers are incompatible (do not have 'update' method), they
@@ -177,21 +1044,33 @@ class Subject(SubjectInterface, Generic[T]):
 
         Args:
             observers (ObserverInterface): variable number of observers to attach
+            topics (Optional[Iterable[Hashable]], optional): the topics the
+                observers are interested in. Defaults to None, meaning all topics.
+            weak (bool, optional): whether to hold the observers by weak
+                references (see 'attach'). Defaults to False.
+            priority (int, optional): observers with higher priority are
+                notified first (see 'attach'). Defaults to 0.
+            cpu_bound (bool, optional): whether the observers do CPU-bound
+                work, to be notified in other processes (see 'attach').
+                Defaults to False.
 
         Returns:
             AddObserversResult: with 'added' and 'failed' lists of observers
         """
-        # find compatible observers/listeners/subscribers, by checking the 'update' attribute
-        compatible_listeners = [
-            obs for obs in observers if callable(getattr(obs, 'update', None))
-        ]
+        # split compatible observers/listeners/subscribers, by checking the 'update' attribute
+        compatible_listeners: List[ObserverInterface] = []
+        failed: List[ObserverInterface] = []
+        for obs in observers:
+            (
+                compatible_listeners if callable(getattr(obs, 'update', None)) else failed
+            ).append(obs)
 
-        # add compatible listenrs to list of subscribers
-        self._observers.extend(compatible_listeners)
+        # add compatible listenrs to the subscribers
+        subscribed_topics = None if topics is None else tuple(topics)
+        for listener in compatible_listeners:
+            self._subscribe(listener, subscribed_topics, weak, priority, cpu_bound)
 
-        return AddObserversResult(
-            compatible_listeners, [x for x in observers if x not in compatible_listeners]
-        )
+        return AddObserversResult(compatible_listeners, failed)
 
     @property
     def state(self) -> StateVariableType:
@@ -210,3 +1089,426 @@ class Subject(SubjectInterface, Generic[T]):
             state (StateType): the state object
         """
         self._state = state
+
+
+class _Lane:
+    """A queue of notifications, delivered in order by a dedicated thread."""
+
+    def __init__(self) -> None:
+        self.notifications: Deque[Tuple[Any, Tuple[Any, ...]]] = deque()
+        # queued notifications, plus the one being delivered
+        self.unfinished = 0
+        self.condition = threading.Condition()
+        self.thread: Optional[threading.Thread] = None
+
+
+class Dispatcher:
+    """Delivers notifications on background threads, off the notifying thread.
+
+    A Subject with a dispatcher only enqueues its notifications, each carrying
+    a snapshot of the subject (its Event, or else a shallow copy of it) and of
+    the observers to notify, so that 'notify' returns without waiting for the
+    observers. Observers receive the snapshot, instead of the subject itself.
+
+    Each subject is served by the same thread, so that its notifications are
+    delivered in order, while a dispatcher with multiple threads can serve many
+    subjects in parallel.
+
+    Once a thread's queue is full, 'backpressure' decides what happens:
+    'block' (the notifying thread waits for room), 'drop-oldest' (the oldest
+    queued notification is discarded) or 'drop-newest' (the new notification
+    is discarded). Discarded notifications are counted in 'dropped'.
+
+    Async observers are awaited on an event loop of the dispatcher's thread,
+    before the next observer is notified.
+
+    If an observer raises an error, the error is passed to 'on_error' (logged
+    by default) and the notification is still delivered to the next observers.
+
+    Example:
+
+        >>> from software_patterns import Subject
+        >>> from software_patterns.notification import Dispatcher
+
+        >>> class Logger:
+        ...  def update(self, subject):
+        ...   print(f'logged {subject.state}')
+
+        >>> dispatcher = Dispatcher()
+        >>> subject = Subject(dispatcher=dispatcher)
+        >>> subject.attach(Logger())
+        >>> for state in ('event-1', 'event-2'):
+        ...  subject.state = state
+        ...  subject.notify()
+        >>> dispatcher.close()
+        logged event-1
+        logged event-2
+
+    Args:
+        threads (int, optional): number of dispatcher threads. Defaults to 1.
+        max_queue (int, optional): maximum number of queued notifications, per
+            thread. Defaults to 1024.
+        backpressure (str, optional): 'block', 'drop-oldest' or 'drop-newest'.
+            Defaults to 'block'.
+        on_error (Optional[Callable[[Exception], None]], optional): handles
+            the errors of observers. Defaults to None, meaning they are logged.
+    """
+
+    def __init__(
+        self,
+        threads: int = 1,
+        max_queue: int = 1024,
+        backpressure: str = 'block',
+        on_error: Optional[Callable[[Exception], None]] = None,
+    ):
+        if backpressure not in ('block', 'drop-oldest', 'drop-newest'):
+            raise ValueError(
+                f"Expected backpressure 'block', 'drop-oldest' or 'drop-newest', got {backpressure!r}."
+            )
+        self.max_queue = max_queue
+        self.backpressure = backpressure
+        self.on_error = on_error or self._log_error
+        self.dropped = 0
+        self._lanes = [_Lane() for _ in range(threads)]
+        self._closed = False
+
+    def submit(self, subject: Any, snapshot: Any, observers: Tuple[Any, ...]) -> bool:
+        """Enqueue the notification of the observers, with a snapshot of the subject.
+
+        Returns:
+            bool: whether the notification was enqueued (ie not dropped)
+        """
+        lane = self._lanes[hash(subject) % len(self._lanes)]
+        with lane.condition:
+            if self._closed:
+                raise RuntimeError("Cannot notify through a closed dispatcher.")
+            if len(lane.notifications) >= self.max_queue:
+                if self.backpressure == 'drop-newest':
+                    self.dropped += 1
+                    return False
+                if self.backpressure == 'drop-oldest':
+                    lane.notifications.popleft()
+                    lane.unfinished -= 1
+                    self.dropped += 1
+                else:
+                    while len(lane.notifications) >= self.max_queue and not self._closed:
+                        lane.condition.wait()
+                    if self._closed:
+                        raise RuntimeError("Cannot notify through a closed dispatcher.")
+            lane.notifications.append((snapshot, observers))
+            lane.unfinished += 1
+            lane.condition.notify_all()
+            if lane.thread is None:
+                lane.thread = threading.Thread(target=self._deliver, args=(lane,), daemon=True)
+                lane.thread.start()
+        return True
+
+    def _deliver(self, lane: _Lane) -> None:
+        # runs the coroutines of async observers; created on first use
+        loop: Optional[asyncio.AbstractEventLoop] = None
+        try:
+            while True:
+                with lane.condition:
+                    while not lane.notifications and not self._closed:
+                        lane.condition.wait()
+                    if not lane.notifications:
+                        return  # closed and drained
+                    snapshot, observers = lane.notifications.popleft()
+                    # wake up the notifying threads waiting for room
+                    lane.condition.notify_all()
+                try:
+                    for observer in observers:
+                        try:
+                            result = observer.update(snapshot)
+                            if inspect.isawaitable(result):
+                                if loop is None:
+                                    loop = asyncio.new_event_loop()
+                                loop.run_until_complete(result)
+                        except StopPropagation:
+                            break
+                        except Exception as error:
+                            self.on_error(error)
+                finally:
+                    with lane.condition:
+                        lane.unfinished -= 1
+                        lane.condition.notify_all()
+        finally:
+            if loop is not None:
+                loop.close()
+
+    @staticmethod
+    def _log_error(error: Exception) -> None:
+        logger.error('Observer failed to handle a notification', exc_info=error)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until all the queued notifications are delivered.
+
+        Args:
+            timeout (Optional[float], optional): maximum seconds to wait.
+                Defaults to None, meaning no limit.
+
+        Returns:
+            bool: whether all the notifications were delivered in time
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for lane in self._lanes:
+            with lane.condition:
+                remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+                if not lane.condition.wait_for(lambda: lane.unfinished == 0, remaining):
+                    return False
+        return True
+
+    def close(self) -> None:
+        """Deliver the queued notifications and stop the threads; no more can be enqueued."""
+        for lane in self._lanes:
+            with lane.condition:
+                self._closed = True
+                lane.condition.notify_all()
+        for lane in self._lanes:
+            if lane.thread is not None:
+                lane.thread.join()
+
+
+class _Coalescer:
+    """Observer delivering to another observer only the latest of rapid notifications.
+
+    Notifications arriving before the wrapped observer is due are collapsed into
+    the latest one (a snapshot of the subject), or merged into it, given a
+    'merge' function of the pending and the new state.
+
+    Errors of the wrapped observer are logged, instead of reaching the subject
+    (or the timer thread), unless delivered by an explicit 'flush'.
+    """
+
+    # whether the wrapped observer's 'update' method may be a coroutine function
+    _awaits = False
+
+    def __init__(self, observer: Any, merge: Optional[Callable[[Any, Any], Any]] = None):
+        if not callable(getattr(observer, 'update', None)):
+            raise TypeError(
+                f"Wrapped observer {observer!r} does not have a callable 'update' method."
+            )
+        if not self._awaits and inspect.iscoroutinefunction(observer.update):
+            raise TypeError(
+                f"{type(self).__name__} cannot await the 'update' method of {observer!r};"
+                " use TickCoalesced, within an event loop."
+            )
+        self.observer = observer
+        self.merge = merge
+        self._pending: Any = None
+        self._lock = threading.Lock()
+
+    def _coalesce(self, subject: Any) -> None:
+        """Keep a snapshot of the subject as the pending notification (call holding the lock)."""
+        if isinstance(subject, Event):
+            snapshot = subject
+            if self._pending is not None and self.merge is not None:
+                snapshot = subject.replace(
+                    state=self.merge(self._pending.state, subject.state)
+                )
+        else:
+            snapshot = copy.copy(subject)
+            if self._pending is not None and self.merge is not None:
+                snapshot.state = self.merge(self._pending.state, snapshot.state)
+        self._pending = snapshot
+
+    def flush(self) -> None:
+        """Deliver the pending notification (if any) now."""
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self.observer.update(pending)
+
+    def _flush_in_background(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is not None:
+            self._update(pending)
+
+    def _update(self, subject: Any) -> Any:
+        """Notify the wrapped observer, logging its errors; returns what 'update' returned."""
+        try:
+            return self.observer.update(subject)
+        except StopPropagation:
+            pass  # only the wrapped observer is notified, so there is nothing to stop
+        except Exception as error:
+            logger.error('Observer failed to handle a notification', exc_info=error)
+        return None
+
+
+class Debounced(_Coalescer):
+    """Notify an observer once notifications stop arriving for some time.
+
+    The wrapped observer receives (from a timer thread) the latest (or merged)
+    notification, once 'wait' seconds pass without any new notification.
+
+    Example:
+
+        >>> import time
+        >>> from software_patterns import Subject
+        >>> from software_patterns.notification import Debounced
+
+        >>> class Printer:
+        ...  def update(self, subject):
+        ...   print(f'saving {subject.state}')
+
+        >>> subject = Subject()
+        >>> subject.attach(Debounced(Printer(), wait=0.01))
+        >>> for state in range(100):
+        ...  subject.state = state
+        ...  subject.notify()
+        >>> time.sleep(0.1)
+        saving 99
+
+    Args:
+        observer (Any): the observer to notify, with a sync 'update' method
+        wait (float): seconds without notifications, before notifying
+        merge (Optional[Callable[[Any, Any], Any]], optional): merges the
+            pending and the new state. Defaults to None, meaning the latest
+            state is delivered.
+        timer (Callable[[], float], optional): clock function. Defaults to
+            time.monotonic.
+    """
+
+    def __init__(
+        self,
+        observer: Any,
+        wait: float,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(observer, merge)
+        self.wait = wait
+        self.timer = timer
+        self._deadline = 0.0
+        self._timer_thread: Optional[threading.Timer] = None
+
+    def update(self, subject: Any) -> None:
+        with self._lock:
+            self._coalesce(subject)
+            self._deadline = self.timer() + self.wait
+            # instead of rescheduling on every notification, the timer re-arms itself
+            if self._timer_thread is None:
+                self._arm(self.wait)
+
+    def _arm(self, delay: float) -> None:
+        self._timer_thread = threading.Timer(delay, self._expire)
+        self._timer_thread.daemon = True
+        self._timer_thread.start()
+
+    def _expire(self) -> None:
+        with self._lock:
+            remaining = self._deadline - self.timer()
+            if remaining > 0:
+                self._arm(remaining)
+                return
+            self._timer_thread = None
+        self._flush_in_background()
+
+
+class Throttled(_Coalescer):
+    """Notify an observer at most once per time interval.
+
+    A notification is delivered right away, if the observer was not notified
+    during the last 'interval' seconds. Otherwise, it is kept (collapsed with
+    any later ones) and delivered (from a timer thread) once the interval
+    passes.
+
+    Args:
+        observer (Any): the observer to notify, with a sync 'update' method
+        interval (float): minimum seconds between notifications
+        merge (Optional[Callable[[Any, Any], Any]], optional): merges the
+            pending and the new state. Defaults to None, meaning the latest
+            state is delivered.
+        timer (Callable[[], float], optional): clock function. Defaults to
+            time.monotonic.
+    """
+
+    def __init__(
+        self,
+        observer: Any,
+        interval: float,
+        merge: Optional[Callable[[Any, Any], Any]] = None,
+        timer: Callable[[], float] = time.monotonic,
+    ):
+        super().__init__(observer, merge)
+        self.interval = interval
+        self.timer = timer
+        self._next_delivery = float('-inf')
+        self._timer_thread: Optional[threading.Timer] = None
+
+    def update(self, subject: Any) -> None:
+        with self._lock:
+            now = self.timer()
+            due = self._timer_thread is None and now >= self._next_delivery
+            if due:
+                self._next_delivery = now + self.interval
+            else:
+                self._coalesce(subject)
+                if self._timer_thread is None:
+                    self._timer_thread = threading.Timer(
+                        self._next_delivery - now, self._expire
+                    )
+                    self._timer_thread.daemon = True
+                    self._timer_thread.start()
+        if due:
+            self._update(subject)
+
+    def _expire(self) -> None:
+        with self._lock:
+            self._timer_thread = None
+            self._next_delivery = self.timer() + self.interval
+        self._flush_in_background()
+
+
+class TickCoalesced(_Coalescer):
+    """Notify an observer once per event loop iteration (tick).
+
+    Notifications during the same tick are collapsed, into a single delivery
+    scheduled for the next tick of the running event loop. Coroutine 'update'
+    methods are scheduled as tasks.
+
+    Args:
+        observer (Any): the observer to notify
+        merge (Optional[Callable[[Any, Any], Any]], optional): merges the
+            pending and the new state. Defaults to None, meaning the latest
+            state is delivered.
+    """
+
+    _awaits = True
+
+    def __init__(self, observer: Any, merge: Optional[Callable[[Any, Any], Any]] = None):
+        super().__init__(observer, merge)
+        self._tasks: Set['asyncio.Future[Any]'] = set()
+
+    def update(self, subject: Any) -> None:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            scheduled = self._pending is not None
+            self._coalesce(subject)
+        if not scheduled:
+            loop.call_soon(self._deliver)
+
+    def _deliver(self) -> None:
+        with self._lock:
+            pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        result = self._update(pending)
+        if inspect.isawaitable(result):
+            task = asyncio.ensure_future(result)
+            # hold a reference, so that the task is not garbage collected while pending
+            self._tasks.add(task)
+            task.add_done_callback(self._finish)
+
+    def _finish(self, task: 'asyncio.Future[Any]') -> None:
+        self._tasks.discard(task)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None and not isinstance(error, StopPropagation):
+            logger.error('Observer failed to handle a notification', exc_info=error)
+
+
+class StopPropagation(Exception):
+    pass
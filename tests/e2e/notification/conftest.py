@@ -0,0 +1,34 @@
+import threading
+
+import pytest
+
+
+@pytest.fixture
+def recording_observer():
+    from software_patterns import Observer
+
+    class RecordingObserver(Observer):
+        """Record every notification: the payload, its state and the thread.
+
+        When given a ``log``, the observer's ``name`` is appended to it on
+        every update, to check the delivery order across observers.
+        """
+
+        def __init__(self, name=None, log=None, on_update=None):
+            self.name = name
+            self.log = log
+            self.on_update = on_update
+            self.events = []
+            self.received = []
+            self.threads = set()
+
+        def update(self, subject):
+            self.events.append(subject)
+            self.received.append(subject.state)
+            self.threads.add(threading.current_thread())
+            if self.log is not None:
+                self.log.append(self.name)
+            if self.on_update is not None:
+                self.on_update(subject)
+
+    return RecordingObserver
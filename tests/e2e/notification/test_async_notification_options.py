@@ -0,0 +1,149 @@
+import asyncio
+import threading
+
+import pytest
+
+from software_patterns import Subject
+
+
+class Concurrency:
+    """Counts the deliveries running at the same time."""
+
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+
+class AsyncObserver:
+    def __init__(self, concurrency, delay=0.0, error=None):
+        self.concurrency = concurrency
+        self.delay = delay
+        self.error = error
+        self.completed = False
+
+    async def update(self, subject):
+        self.concurrency.running += 1
+        self.concurrency.max_running = max(
+            self.concurrency.max_running, self.concurrency.running
+        )
+        try:
+            await asyncio.sleep(self.delay)
+            if self.error is not None:
+                raise self.error
+            self.completed = True
+        finally:
+            self.concurrency.running -= 1
+
+
+@pytest.fixture
+def subject():
+    return Subject([])
+
+
+@pytest.fixture
+def concurrency():
+    return Concurrency()
+
+
+@pytest.mark.asyncio
+async def test_notify_async_gathers_all_errors_and_latencies(subject, concurrency):
+    observers = [
+        AsyncObserver(concurrency, delay=1.0),
+        AsyncObserver(concurrency, error=ValueError('bad')),
+        AsyncObserver(concurrency, delay=0.01),
+    ]
+    subject.add(*observers)
+    result = await subject.notify_async(timeout=0.05, errors='report', max_concurrency=2)
+
+    assert [delivery.observer for delivery in result.deliveries] == observers
+    assert isinstance(result.deliveries[0].error, asyncio.TimeoutError)
+    assert isinstance(result.deliveries[1].error, ValueError)
+    assert result.deliveries[2].error is None and observers[2].completed
+    assert result.failed == result.deliveries[:2]
+    assert all(delivery.latency >= 0 for delivery in result.deliveries)
+    assert result.deliveries[0].latency > 0
+    assert concurrency.max_running == 2
+
+
+@pytest.mark.asyncio
+async def test_notify_async_raises_the_first_error_once_all_deliveries_end(
+    subject, concurrency
+):
+    slow = AsyncObserver(concurrency, delay=0.05)
+    subject.add(
+        AsyncObserver(concurrency, error=ValueError('first')),
+        slow,
+        AsyncObserver(concurrency, error=KeyError()),
+    )
+    with pytest.raises(ValueError, match='first'):
+        await subject.notify_async()
+    assert concurrency.running == 0
+    assert slow.completed
+
+
+@pytest.mark.asyncio
+async def test_notify_async_cancel_on_error_cancels_ongoing_deliveries(subject, concurrency):
+    slow = AsyncObserver(concurrency, delay=1.0)
+    subject.add(slow, AsyncObserver(concurrency, error=ValueError('bad')))
+    with pytest.raises(ValueError, match='bad'):
+        await subject.notify_async(errors='cancel')
+    await asyncio.sleep(0)
+    assert concurrency.running == 0
+    assert not slow.completed
+
+
+@pytest.mark.asyncio
+async def test_notify_async_offloads_sync_observers_to_executor(subject):
+    from concurrent.futures import ThreadPoolExecutor
+
+    threads = []
+    # passed only once both observers are running, ie concurrently
+    barrier = threading.Barrier(2, timeout=10)
+
+    class SyncObserver:
+        def update(self, subject):
+            barrier.wait()
+            threads.append(threading.current_thread())
+
+    subject.add(SyncObserver(), SyncObserver())
+    with ThreadPoolExecutor(2) as executor:
+        result = await subject.notify_async(executor=executor)
+    assert len(threads) == 2
+    assert threading.main_thread() not in threads
+    assert result.failed == []
+
+
+@pytest.mark.asyncio
+async def test_notify_async_rejects_unknown_error_handling(subject):
+    with pytest.raises(ValueError):
+        await subject.notify_async(errors='ignore')
+
+
+@pytest.mark.asyncio
+async def test_notify_async_without_options_reports_each_delivery(subject, concurrency):
+    class SyncObserver:
+        def update(self, subject):
+            return 'sync'
+
+    class ResultObserver:
+        async def update(self, subject):
+            await asyncio.sleep(0)
+            return 'async'
+
+    observers = [
+        SyncObserver(),
+        ResultObserver(),
+        AsyncObserver(concurrency, error=ValueError('bad')),
+        SyncObserver(),
+    ]
+    subject.add(*observers)
+    result = await subject.notify_async(errors='report')
+    assert [delivery.observer for delivery in result.deliveries] == observers
+    assert [delivery.result for delivery in result.deliveries] == [
+        'sync',
+        'async',
+        None,
+        'sync',
+    ]
+    assert result.failed == [result.deliveries[2]]
+    assert all(delivery.latency >= 0 for delivery in result.deliveries)
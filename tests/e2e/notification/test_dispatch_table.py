@@ -0,0 +1,47 @@
+import pytest
+
+from software_patterns import Subject
+
+
+class LookupCountingObserver:
+    def __init__(self):
+        self.lookups = 0
+        self.updates = 0
+
+    @property
+    def update(self):
+        self.lookups += 1
+        return self._handle
+
+    def _handle(self, subject):
+        self.updates += 1
+
+
+@pytest.mark.asyncio
+async def test_update_method_is_resolved_when_attached_for_async_dispatch():
+    subject = Subject([])
+    observer = LookupCountingObserver()
+    subject.attach(observer, topics=['orders'])
+    lookups = observer.lookups
+
+    for _ in range(3):
+        await subject.notify_async(topic='orders')
+        await subject.notify_async()
+    assert observer.updates == 6
+    assert observer.lookups == lookups
+
+
+def test_dispatch_table_follows_subscription_changes(recording_observer):
+    received = []
+    subject = Subject([])
+    first = recording_observer('first', received)
+    second = recording_observer('second', received)
+    subject.attach(first)
+    subject.notify(topic='orders')
+    subject.attach(second, topics=['orders'])
+    subject.notify(topic='orders')
+    subject.notify(topic='users')
+    subject.detach(first)
+    subject.notify(topic='orders')
+    subject.notify(topic='users')
+    assert received == ['first', 'first', 'second', 'first', 'second']
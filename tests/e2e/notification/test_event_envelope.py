@@ -0,0 +1,53 @@
+import pytest
+
+from software_patterns import Subject
+from software_patterns.notification import Dispatcher, Event
+
+
+def test_observers_share_an_immutable_event_per_notification(recording_observer):
+    subject = Subject([], events=True)
+    first, second = recording_observer(), recording_observer()
+    subject.add(first, second)
+    subject.state = {'progress': 10}
+    subject.notify()
+    subject.state = {'progress': 20}
+    subject.notify(topic='progress')
+
+    assert [event.state for event in first.events] == [{'progress': 10}, {'progress': 20}]
+    assert [event.sequence for event in first.events] == [1, 2]
+    assert [event.topic for event in first.events] == [None, 'progress']
+    assert first.events[0].timestamp <= first.events[1].timestamp
+    assert all(mine is theirs for mine, theirs in zip(first.events, second.events))
+    with pytest.raises(AttributeError):
+        first.events[0].state = 'changed'
+    assert not hasattr(first.events[0], '__dict__')
+    assert first.events[0].replace(state='new').state == 'new'
+
+
+def test_queued_observers_see_the_state_at_notification_time(recording_observer):
+    dispatcher = Dispatcher()
+    subject = Subject([], events=True, dispatcher=dispatcher)
+    observer = recording_observer()
+    subject.attach(observer)
+    for state in range(50):
+        subject.state = state
+        subject.notify()
+    dispatcher.close()
+    assert [event.state for event in observer.events] == list(range(50))
+    assert all(isinstance(event, Event) for event in observer.events)
+
+
+@pytest.mark.asyncio
+async def test_async_observers_receive_the_event(recording_observer):
+    received = []
+
+    class AsyncObserver:
+        async def update(self, event):
+            received.append(event)
+
+    subject = Subject([], events=True)
+    subject.add(AsyncObserver(), recording_observer())
+    subject.state = 'ready'
+    result = await subject.notify_async()
+    assert received[0].state == 'ready'
+    assert received[0] is result.deliveries[1].observer.events[0]
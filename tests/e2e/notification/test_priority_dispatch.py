@@ -0,0 +1,51 @@
+import pytest
+
+from software_patterns import Subject
+from software_patterns.notification import StopPropagation
+
+
+def consume(subject):
+    raise StopPropagation
+
+
+def test_observers_are_notified_by_descending_priority_then_attach_order(recording_observer):
+    received = []
+    subject = Subject([])
+    subject.attach(recording_observer('metrics', received), priority=-1)
+    subject.attach(recording_observer('audit', received))
+    subject.attach(recording_observer('invalidator', received), topics=['orders'], priority=5)
+    subject.attach(recording_observer('logger', received))
+    subject.notify(topic='orders')
+    subject.notify(topic='users')
+    assert received == [
+        'invalidator',
+        'audit',
+        'logger',
+        'metrics',
+        'audit',
+        'logger',
+        'metrics',
+    ]
+
+
+def test_consumed_notification_stops_propagating(recording_observer):
+    received = []
+    subject = Subject([])
+    subject.add(recording_observer('metrics', received))
+    subject.attach(recording_observer('guard', received, on_update=consume), priority=1)
+    subject.notify()
+    subject.notify()
+    assert received == ['guard', 'guard']
+
+
+@pytest.mark.asyncio
+async def test_consumed_async_notification_stops_propagating(recording_observer):
+    received = []
+    subject = Subject([])
+    subject.add(recording_observer('metrics', received))
+    guard = recording_observer('guard', received, on_update=consume)
+    subject.attach(guard, priority=1)
+    result = await subject.notify_async()
+    assert received == ['guard']
+    assert [delivery.observer for delivery in result.deliveries] == [guard]
+    assert not result.failed
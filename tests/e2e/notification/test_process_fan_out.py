@@ -0,0 +1,53 @@
+import os
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+
+from software_patterns import Subject
+from software_patterns.notification import _Parcel
+
+
+class Scorer:
+    def update(self, event):
+        return sum(event.state), os.getpid()
+
+
+class FailingScorer:
+    def update(self, event):
+        raise ValueError(event.sequence)
+
+
+@pytest.mark.asyncio
+async def test_cpu_bound_observers_are_notified_in_processes():
+    subject = Subject([], events=True)
+    subject.add(Scorer(), FailingScorer(), cpu_bound=True)
+    subject.state = list(range(10))
+    with ProcessPoolExecutor(max_workers=2) as processes:
+        result = await subject.notify_async(processes=processes, errors='report')
+    (total, pid), error = result.deliveries[0].result, result.deliveries[1].error
+    assert total == 45
+    assert pid != os.getpid()
+    assert isinstance(error, ValueError) and error.args == (1,)
+    assert result.failed == [result.deliveries[1]]
+
+
+@pytest.mark.asyncio
+async def test_large_events_are_passed_through_shared_memory():
+    subject = Subject([], events=True)
+    subject.add(*[Scorer() for _ in range(3)], cpu_bound=True)
+    subject.state = bytes(range(256)) * 1024
+    parcel = _Parcel(subject._payload(None))
+    assert len(pickle.dumps(parcel)) < 1024
+    assert pickle.loads(pickle.dumps(parcel)).open().state == subject.state
+    parcel.release()
+    with ProcessPoolExecutor(max_workers=2) as processes:
+        result = await subject.notify_async(processes=processes)
+    assert [delivery.result[0] for delivery in result.deliveries] == [sum(subject.state)] * 3
+
+
+def test_cpu_bound_observers_require_events():
+    with pytest.raises(ValueError, match='events=True'):
+        Subject([]).attach(Scorer(), cpu_bound=True)
+    with pytest.raises(ValueError, match='weakly'):
+        Subject([], events=True).attach(Scorer(), weak=True, cpu_bound=True)
@@ -0,0 +1,90 @@
+import threading
+
+import pytest
+
+from software_patterns import Subject
+from software_patterns.notification import Dispatcher
+
+
+def notify_states(subject, states):
+    for state in states:
+        subject.state = state
+        subject.notify()
+
+
+def test_queued_notifications_are_delivered_in_order_off_thread(recording_observer):
+    dispatcher = Dispatcher(threads=4)
+    subjects = [Subject(dispatcher=dispatcher) for _ in range(8)]
+    observers = [recording_observer() for _ in subjects]
+    for subject, observer in zip(subjects, observers):
+        subject.attach(observer)
+    for subject in subjects:
+        notify_states(subject, range(100))
+    assert dispatcher.flush(timeout=5)
+    for observer in observers:
+        assert observer.received == list(range(100))
+        assert threading.current_thread() not in observer.threads
+        assert len(observer.threads) == 1
+    dispatcher.close()
+    with pytest.raises(RuntimeError):
+        subjects[0].notify()
+
+
+@pytest.mark.parametrize(
+    'backpressure, expected',
+    [('drop-oldest', [0, 3, 4]), ('drop-newest', [0, 1, 2])],
+)
+def test_queued_notifications_backpressure(backpressure, expected, recording_observer):
+    gate = threading.Event()
+    dispatcher = Dispatcher(max_queue=2, backpressure=backpressure)
+    subject = Subject(dispatcher=dispatcher)
+    observer = recording_observer(on_update=lambda subject: gate.wait())
+    subject.attach(observer)
+    subject.state = 0
+    subject.notify()
+    # wait until the first notification is being delivered, so only the others queue
+    while dispatcher._lanes[0].notifications:
+        pass
+    notify_states(subject, [1, 2, 3, 4])
+    assert not dispatcher.flush(timeout=0.01)
+    gate.set()
+    dispatcher.close()
+    assert observer.received == expected
+    assert dispatcher.dropped == 2
+
+
+def test_queued_notification_errors_are_reported_and_do_not_hinder_other_observers(
+    recording_observer,
+):
+    errors = []
+    dispatcher = Dispatcher(on_error=errors.append)
+    subject = Subject(dispatcher=dispatcher)
+
+    class FailingObserver:
+        def update(self, subject):
+            raise ValueError(subject.state)
+
+    observer = recording_observer()
+    subject.add(FailingObserver(), observer)
+    notify_states(subject, ['a', 'b'])
+    dispatcher.close()
+    assert [str(error) for error in errors] == ['a', 'b']
+    assert observer.received == ['a', 'b']
+
+
+def test_queued_notifications_are_awaited_for_async_observers():
+    import asyncio
+
+    received = []
+
+    class AsyncObserver:
+        async def update(self, subject):
+            await asyncio.sleep(0)
+            received.append(subject.state)
+
+    dispatcher = Dispatcher()
+    subject = Subject(dispatcher=dispatcher)
+    subject.attach(AsyncObserver())
+    notify_states(subject, ['a', 'b'])
+    dispatcher.close()
+    assert received == ['a', 'b']
@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from software_patterns import Subject
+from software_patterns.notification import Debounced, Throttled, TickCoalesced
+
+
+def notify_states(subject, states):
+    for state in states:
+        subject.state = state
+        subject.notify()
+
+
+def wait_until(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.005)
+
+
+def test_debounced_observer_receives_merged_state_once_quiet(recording_observer):
+    observer = recording_observer()
+    subject = Subject([])
+    subject.attach(Debounced(observer, wait=0.05, merge=lambda pending, new: pending + new))
+    notify_states(subject, [1, 2, 3])
+    assert observer.received == []
+    wait_until(lambda: observer.received)
+    assert observer.received == [6]
+    assert subject.state == 3
+
+
+def test_throttled_observer_receives_leading_and_latest_trailing_state(recording_observer):
+    observer = recording_observer()
+    subject = Subject([])
+    throttled = Throttled(observer, interval=0.1)
+    subject.attach(throttled)
+    notify_states(subject, range(10))
+    assert observer.received == [0]
+    wait_until(lambda: len(observer.received) == 2)
+    assert observer.received == [0, 9]
+    notify_states(subject, [10])
+    throttled.flush()
+    assert observer.received == [0, 9, 10]
+
+
+@pytest.mark.asyncio
+async def test_tick_coalesced_observer_receives_latest_state_per_tick():
+    received = []
+
+    class AsyncObserver:
+        async def update(self, subject):
+            received.append(subject.state)
+
+    subject = Subject([])
+    subject.attach(TickCoalesced(AsyncObserver()))
+    notify_states(subject, range(5))
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    notify_states(subject, [5, 6])
+    await asyncio.sleep(0)
+    await asyncio.sleep(0)
+    assert received == [4, 6]
+
+
+@pytest.mark.asyncio
+async def test_tick_coalesced_observer_errors_are_logged(caplog):
+    class FailingObserver:
+        async def update(self, subject):
+            await asyncio.sleep(0)
+            raise ValueError(subject.state)
+
+    subject = Subject([])
+    coalesced = TickCoalesced(FailingObserver())
+    subject.attach(coalesced)
+    notify_states(subject, ['a', 'b'])
+    await asyncio.sleep(0)
+    assert len(coalesced._tasks) == 1
+    for _ in range(3):
+        await asyncio.sleep(0)
+    assert not coalesced._tasks
+    assert [str(record.exc_info[1]) for record in caplog.records] == ['b']
+
+
+def test_throttled_observer_errors_are_logged_on_every_delivery(caplog):
+    from software_patterns.notification import StopPropagation
+
+    class FailingObserver:
+        def update(self, subject):
+            if subject.state == 'consumed':
+                raise StopPropagation
+            raise ValueError(subject.state)
+
+    subject = Subject([])
+    throttled = Throttled(FailingObserver(), interval=0.01)
+    subject.attach(throttled)
+    notify_states(subject, ['leading', 'trailing'])  # neither reaches the subject
+    wait_until(lambda: len(caplog.records) == 2)
+    wait_until(lambda: throttled._timer_thread is None)
+    time.sleep(0.02)
+    notify_states(subject, ['consumed'])
+    assert [str(record.exc_info[1]) for record in caplog.records] == ['leading', 'trailing']
+
+
+def test_timer_coalesced_observers_must_be_sync():
+    class AsyncObserver:
+        async def update(self, subject):
+            pass
+
+    with pytest.raises(TypeError, match='TickCoalesced'):
+        Debounced(AsyncObserver(), wait=0.01)
+    with pytest.raises(TypeError, match='TickCoalesced'):
+        Throttled(AsyncObserver(), interval=0.01)
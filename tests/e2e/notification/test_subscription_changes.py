@@ -0,0 +1,96 @@
+import pytest
+
+from software_patterns import Subject
+
+
+def test_duplicate_attach_notifies_once(recording_observer):
+    received = []
+    subject = Subject([])
+    observer_a = recording_observer('a', received)
+    observer_b = recording_observer('b', received)
+    subject.attach(observer_a, topics=['orders'])
+    subject.attach(observer_b)
+    subject.attach(observer_a, topics=['orders', 'users'])
+    subject.add(observer_b)
+
+    subject.notify(topic='orders')
+    subject.notify(topic='users')
+    subject.notify()
+    assert received == ['a', 'b', 'a', 'b', 'a', 'b']  # in attach order, for any topic
+
+    subject.detach(observer_a)
+    with pytest.raises(ValueError):
+        subject.detach(observer_a)
+
+
+def test_reattached_observer_keeps_its_place_for_every_topic(recording_observer):
+    received = []
+    subject = Subject([])
+    observer_a = recording_observer('a', received)
+    subject.attach(observer_a, topics=['t'])
+    subject.attach(recording_observer('b', received))
+    subject.attach(observer_a)
+    subject.notify()
+    subject.notify(topic='t')
+    subject.notify(topic='other')
+    assert received == ['a', 'b'] * 3
+
+
+def test_subscriptions_changed_while_notifying_apply_to_next_notification(recording_observer):
+    received = []
+    subject = Subject([])
+    late = recording_observer('late', received)
+    last = recording_observer('last', received)
+
+    def reorganise(subject):
+        subject.detach(last)
+        subject.attach(late)
+
+    first = recording_observer('first', received, on_update=reorganise)
+    subject.add(first, last)
+    subject.notify()
+    assert received == ['first', 'last']
+
+    received.clear()
+    first.on_update = lambda subject: subject.detach(first)
+    subject.notify()
+    subject.notify()
+    assert received == ['first', 'late', 'late']
+
+
+def test_add_reports_incompatible_observers_in_order(recording_observer):
+    subject = Subject([])
+    observers = [recording_observer(str(index), []) for index in range(3)]
+    result = subject.add(object, observers[0], 'no-update', observers[1], observers[2])
+    assert result.added == observers
+    assert result.failed == [object, 'no-update']
+    assert [subscription[0] for subscription in subject._observers.values()] == observers
+
+
+def test_observers_are_registered_by_identity():
+    from collections import namedtuple
+
+    received = []
+
+    class UnhashableObserver:  # like a (non frozen) dataclass
+        def __init__(self, name):
+            self.name = name
+
+        def __eq__(self, other):
+            return isinstance(other, UnhashableObserver) and self.name == other.name
+
+        def update(self, subject):
+            received.append(self.name)
+
+    Listener = namedtuple('Listener', ['update'])
+    subject = Subject([])
+    first = Listener(lambda subject: received.append('tuple'))
+    second = Listener(first.update)  # equal to the first, but a distinct observer
+    subject.add(UnhashableObserver('unhashable'), first, second)
+    subject.notify()
+    assert received == ['unhashable', 'tuple', 'tuple']
+
+    subject.detach(second)
+    received.clear()
+    subject.notify()
+    assert received == ['unhashable', 'tuple']
@@ -0,0 +1,50 @@
+from software_patterns import Subject
+
+
+def test_topic_notifications_reach_interested_observers_only(recording_observer):
+    received = []
+    subject = Subject([])
+    orders = recording_observer('orders', received)
+    everything = recording_observer('everything', received)
+    users_and_orders = recording_observer('users-and-orders', received)
+    subject.attach(orders, topics=['orders'])
+    subject.attach(everything)
+    subject.attach(users_and_orders, topics=['users', 'orders'])
+
+    subject.state = 'order-created'
+    subject.notify(topic='orders')
+    subject.state = 'user-created'
+    subject.notify(topic='users')
+    subject.state = 'invoice-created'
+    subject.notify(topic='invoices')
+    subject.state = 'shutdown'
+    subject.notify()
+    assert received == [
+        'orders',
+        'everything',
+        'users-and-orders',
+        'everything',
+        'users-and-orders',
+        'everything',
+        'orders',
+        'everything',
+        'users-and-orders',
+    ]
+    assert orders.received == ['order-created', 'shutdown']
+    assert everything.received == [
+        'order-created',
+        'user-created',
+        'invoice-created',
+        'shutdown',
+    ]
+    assert users_and_orders.received == ['order-created', 'user-created', 'shutdown']
+
+    received.clear()
+    subject.detach(orders)
+    subject.detach(everything)
+    subject.notify(topic='orders')
+    assert received == ['users-and-orders']
+    assert users_and_orders.received[-1] == 'shutdown'
+    assert set(subject._topics) == {'users', 'orders'}
+    subject.detach(users_and_orders)
+    assert subject._topics == {}
@@ -0,0 +1,65 @@
+import gc
+from collections import namedtuple
+
+import pytest
+
+from software_patterns import Subject
+
+
+def test_weakly_attached_observer_is_detached_once_collected(recording_observer):
+    subject = Subject([])
+    kept, transient = recording_observer(), recording_observer()
+    subject.attach(kept, weak=True)
+    subject.attach(transient, weak=True, topics=['orders'])
+    subject.notify(topic='orders')
+    assert (len(kept.received), len(transient.received)) == (1, 1)
+    assert id(kept) in subject._observers
+
+    del transient
+    gc.collect()
+    subject.notify(topic='orders')
+    assert len(kept.received) == 2
+    assert len(subject._observers) == 1
+    assert subject._topics == {}
+
+    subject.detach(kept)
+    with pytest.raises(ValueError):
+        subject.detach(kept)
+
+
+def test_weakly_attached_bound_method_listener():
+    class Handler:
+        def __init__(self):
+            self.updates = 0
+
+        def on_event(self, subject):
+            self.updates += 1
+
+    handler = Handler()
+    subject = Subject([])
+    # tuples do not support weak references: the bound method is referenced weakly
+    subject.attach(namedtuple('Listener', ['update'])(handler.on_event), weak=True)
+    subject.notify()
+    assert handler.updates == 1
+
+    del handler
+    gc.collect()
+    subject.notify()
+    assert len(subject._observers) == 0
+
+
+@pytest.mark.asyncio
+async def test_weakly_attached_async_observer():
+    class AsyncObserver:
+        def __init__(self):
+            self.updates = 0
+
+        async def update(self, subject):
+            self.updates += 1
+
+    observer = AsyncObserver()
+    subject = Subject([])
+    subject.add(observer, weak=True)
+    result = await subject.notify_async()
+    assert observer.updates == 1
+    assert [delivery.observer for delivery in result.deliveries] == [observer]
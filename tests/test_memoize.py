@@ -25,9 +25,1191 @@ def test_simple_memoize(simple_memoize):
     assert instance1 == instance2
     assert id(instance1) == id(instance2)
     hash1 = simple_memoize._build_hash(*runtime_args, **runtime_kwargs)
-    assert hash1 == hash(
-        '-'.join(
-            [str(_) for _ in runtime_args]
-            + [f'{key}={str(value)}' for key, value in runtime_kwargs.items()]
+    assert hash1 == simple_memoize._build_hash(7, 'gg', kwarg1='something', kwarg2=[1, 2])
+    assert hash1 != simple_memoize._build_hash(7, 'gg', kwarg1='something', kwarg2=[1, 3])
+
+
+@pytest.mark.parametrize(
+    'args1, args2',
+    [
+        ((1, '2-3'), (1, 2, 3)),
+        ((1, 2), ('1', '2')),
+        ((1, 'a', 2), (1,)),
+        (([1, 2],), ((1, 2),)),
+    ],
+)
+def test_default_keys_do_not_collide(args1, args2):
+    from software_patterns.memoize import make_key
+
+    kwargs2 = {'a': 2} if args2 == (1,) else {}
+    assert make_key(*args1) != make_key(*args2, **kwargs2)
+
+
+def test_default_key_fast_path():
+    from software_patterns.memoize import make_key
+
+    assert make_key(5) == 5
+    assert make_key('a') == 'a'
+    assert make_key(5.0) != 5
+
+
+def test_default_key_rejects_unsupported_unhashable_arguments():
+    from software_patterns import ObjectsPool
+
+    class Query:  # like a (non frozen) dataclass, unhashable since it defines __eq__
+        def __init__(self, sql, params):
+            self.sql = sql
+            self.params = params
+
+        def __eq__(self, other):
+            return (self.sql, self.params) == (other.sql, other.params)
+
+        def __repr__(self):  # leaves the parameters out, like a field(repr=False)
+            return f'Query({self.sql!r})'
+
+    pool = ObjectsPool(lambda query: object())
+    with pytest.raises(TypeError, match='Query'):
+        pool.get_object(Query('select', [1]))
+    assert pool.get_object(('select', [1])) is not pool.get_object(('select', [2]))
+
+
+def test_signature_key_normalises_arguments():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import signature_key
+
+    def factory(a, b=2, *args, **kwargs):
+        return object()
+
+    pool = ObjectsPool(factory, hash_callback=signature_key(factory))
+    obj = pool.get_object(1, b=2)
+    assert pool.get_object(1, 2) is obj
+    assert pool.get_object(1) is obj
+    assert pool.get_object(a=1) is obj
+    assert pool.get_object(1, 3) is not obj
+
+
+@pytest.fixture
+def bounded_pool():
+    from software_patterns import ObjectsPool
+
+    def _bounded_pool(**kwargs):
+        class TestClass:
+            def __init__(self, *args):
+                self.args = args
+
+        return ObjectsPool(TestClass, **kwargs)
+
+    return _bounded_pool
+
+
+def test_capacity_evicts_least_recently_used(bounded_pool):
+    pool = bounded_pool(capacity=2)
+    obj1 = pool.get_object(1)
+    pool.get_object(2)
+    assert pool.get_object(1) is obj1  # 1 becomes most recently used
+    pool.get_object(3)  # evicts 2
+
+    assert len(pool._objects) == 2
+    assert pool.get_object(1) is obj1
+    assert pool._build_hash(2) not in pool._objects
+
+
+def test_lfu_policy_evicts_least_frequently_used(bounded_pool):
+    from software_patterns.memoize import LFUPolicy
+
+    pool = bounded_pool(policy=LFUPolicy(2))
+    obj1 = pool.get_object(1)
+    for _ in range(3):
+        pool.get_object(1)
+    obj2 = pool.get_object(2)
+    pool.get_object(2)
+    pool.get_object(3)  # evicts 2, which was used less frequently than 1
+
+    assert len(pool._objects) == 2
+    assert pool.get_object(1) is obj1
+    assert pool.get_object(2) is not obj2
+
+
+def test_ttl_policy_expires_entries(bounded_pool):
+    from software_patterns.memoize import TTLPolicy
+
+    clock = [0.0]
+    pool = bounded_pool(policy=TTLPolicy(10, timer=lambda: clock[0]))
+    obj1 = pool.get_object(1)
+    clock[0] = 5
+    assert pool.get_object(1) is obj1
+
+    clock[0] = 11
+    obj1_renewed = pool.get_object(1)
+    assert obj1_renewed is not obj1
+
+    clock[0] = 15
+    pool.get_object(2)
+    clock[0] = 21.5  # expires 1, but not 2
+    pool.get_object(3)
+    assert pool._build_hash(1) not in pool._objects
+    assert len(pool._objects) == 2
+
+
+def test_expired_entry_whose_rebuild_fails_is_rebuilt_next_time():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import TTLPolicy
+
+    clock = [0.0]
+    failures = [1]
+
+    def build(number):
+        if clock[0] and failures[0]:
+            failures[0] -= 1
+            raise RuntimeError('rebuild failed')
+        return object()
+
+    pool = ObjectsPool(build, policy=TTLPolicy(10, timer=lambda: clock[0]))
+    obj = pool.get_object(1)
+    clock[0] = 11
+    with pytest.raises(RuntimeError):
+        pool.get_object(1)
+    assert pool.get_object(1) is not obj
+
+
+def test_size_weighted_policy_bounds_total_cost(bounded_pool):
+    from software_patterns.memoize import SizeWeightedPolicy
+
+    policy = SizeWeightedPolicy(10, sizeof=lambda obj: obj.args[0])
+    pool = bounded_pool(policy=policy)
+    pool.get_object(4)
+    pool.get_object(5)
+    pool.get_object(3)  # evicts 4
+
+    assert policy.total_cost == 8
+    assert pool._build_hash(4) not in pool._objects
+
+    too_large = pool.get_object(11)
+    assert too_large.args == (11,)
+    assert pool._build_hash(11) not in pool._objects
+    assert policy.total_cost == 0
+
+
+def test_capacity_and_policy_are_mutually_exclusive(bounded_pool):
+    from software_patterns.memoize import LRUPolicy
+
+    with pytest.raises(ValueError, match="either a capacity or a policy"):
+        bounded_pool(capacity=2, policy=LRUPolicy(2))
+
+
+def test_thread_safe_pool_constructs_each_key_once():
+    import threading
+    import time
+
+    from software_patterns import ObjectsPool
+
+    constructed = []
+
+    def slow_constructor(key):
+        constructed.append(key)
+        time.sleep(0.05)
+        return object()
+
+    pool = ObjectsPool(slow_constructor, thread_safe=True)
+    barrier = threading.Barrier(8)
+    results = []
+
+    def request(key):
+        barrier.wait()
+        results.append((key, pool.get_object(key)))
+
+    threads = [threading.Thread(target=request, args=(i % 2,)) for i in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert sorted(constructed) == [0, 1]
+    assert len({id(obj) for key, obj in results if key == 0}) == 1
+    assert len({id(obj) for key, obj in results if key == 1}) == 1
+
+
+def test_thread_safe_pool_shares_construction_failure_and_retries():
+    import threading
+    import time
+
+    from software_patterns import ObjectsPool
+
+    calls = []
+
+    def failing_constructor(key):
+        calls.append(key)
+        time.sleep(0.05)
+        if len(calls) == 1:
+            raise ValueError("Construction failed")
+        return object()
+
+    pool = ObjectsPool(failing_constructor, thread_safe=True)
+    errors = []
+
+    def request():
+        try:
+            pool.get_object('a')
+        except ValueError as error:
+            errors.append(error)
+
+    threads = [threading.Thread(target=request) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(calls) == 1
+    assert len(errors) == 4
+    assert pool.get_object('a') is pool.get_object('a')
+    assert len(calls) == 2
+
+
+def test_thread_safe_pool_detects_recursive_construction():
+    from software_patterns import ObjectsPool
+
+    pool: ObjectsPool = ObjectsPool(lambda key: pool.get_object(key), thread_safe=True)
+    with pytest.raises(RuntimeError, match="Recursive request"):
+        pool.get_object(1)
+
+
+@pytest.mark.asyncio
+async def test_async_pool_coalesces_concurrent_constructions():
+    import asyncio
+
+    from software_patterns import ObjectsPool
+
+    constructed = []
+
+    async def connect(host):
+        constructed.append(host)
+        await asyncio.sleep(0.01)
+        return object()
+
+    pool = ObjectsPool(connect)
+    results = await asyncio.gather(
+        *[pool.get_object_async(host) for host in ('a', 'b', 'a', 'a', 'b')]
+    )
+
+    assert sorted(constructed) == ['a', 'b']
+    assert results[0] is results[2] is results[3]
+    assert results[1] is results[4]
+    assert await pool.get_object_async('a') is results[0]
+    assert not pool._async_flights
+
+
+@pytest.mark.asyncio
+async def test_async_pool_retries_after_failure():
+    import asyncio
+
+    from software_patterns import ObjectsPool
+
+    calls = []
+
+    async def flaky(key):
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        if len(calls) == 1:
+            raise ConnectionError("Remote unavailable")
+        return object()
+
+    pool = ObjectsPool(flaky)
+    results = await asyncio.gather(
+        pool.get_object_async('a'), pool.get_object_async('a'), return_exceptions=True
+    )
+    assert len(calls) == 1
+    assert all(isinstance(result, ConnectionError) for result in results)
+    assert not pool._objects
+
+    obj = await pool.get_object_async('a')
+    assert len(calls) == 2
+    assert pool.get_object('a') is obj
+
+
+@pytest.mark.asyncio
+async def test_async_pool_survives_cancelled_request():
+    import asyncio
+
+    from software_patterns import ObjectsPool
+
+    async def slow(key):
+        await asyncio.sleep(0.05)
+        return object()
+
+    pool = ObjectsPool(slow)
+    first = asyncio.ensure_future(pool.get_object_async('a'))
+    second = asyncio.ensure_future(pool.get_object_async('a'))
+    await asyncio.sleep(0.01)
+    first.cancel()
+
+    obj = await second
+    assert first.cancelled()
+    assert pool.get_object('a') is obj
+
+
+@pytest.fixture
+def resource_pool():
+    from software_patterns.memoize import ResourcePool
+
+    def _resource_pool(**kwargs):
+        class Resource:
+            def __init__(self, name):
+                self.name = name
+                self.healthy = True
+                self.disposed = False
+
+        kwargs.setdefault('dispose', lambda resource: setattr(resource, 'disposed', True))
+        return ResourcePool(Resource, **kwargs)
+
+    return _resource_pool
+
+
+def test_resource_pool_lends_objects_exclusively(resource_pool):
+    pool = resource_pool(max_size=2)
+    with pool.acquire('parser') as parser1:
+        with pool.acquire('parser') as parser2:
+            assert parser1 is not parser2
+        with pool.acquire('parser') as parser3:
+            assert parser3 is parser2
+    with pool.acquire('other') as other:
+        assert other.name == 'other'
+    assert pool._slots[pool._build_hash('parser')].size == 2
+
+
+def test_resource_pool_times_out_when_exhausted(resource_pool):
+    from software_patterns.memoize import PoolExhaustedError
+
+    pool = resource_pool(max_size=1, timeout=0.01)
+    with pool.acquire('parser'):
+        with pytest.raises(PoolExhaustedError):
+            with pool.acquire('parser'):
+                pass
+    with pool.acquire('parser'):
+        pass
+    assert not pool._slots[pool._build_hash('parser')].waiters
+
+
+def test_resource_pool_blocks_until_object_is_returned(resource_pool):
+    import threading
+    import time
+
+    pool = resource_pool(max_size=1)
+    borrowed = []
+
+    def borrow():
+        with pool.acquire('parser') as parser:
+            borrowed.append(parser)
+
+    with pool.acquire('parser') as parser:
+        thread = threading.Thread(target=borrow)
+        thread.start()
+        time.sleep(0.02)
+        assert not borrowed
+    thread.join()
+    assert borrowed == [parser]
+
+
+def test_resource_pool_validates_reaps_and_warms_up(resource_pool):
+    clock = [0.0]
+    pool = resource_pool(
+        min_size=2,
+        max_idle=10,
+        validate=lambda resource: resource.healthy,
+        timer=lambda: clock[0],
+    )
+    with pool.acquire('parser') as parser1:
+        slot = pool._slots[pool._build_hash('parser')]
+        assert slot.size == 2 and len(slot.idle) == 1
+        parser1.healthy = False
+    with pool.acquire('parser') as parser2:
+        with pool.acquire('parser') as parser3:
+            with pool.acquire('parser'):
+                pass
+    assert parser1.disposed
+    assert parser1 not in (parser2, parser3)
+    assert slot.size == 3
+
+    clock[0] = 20
+    assert pool.reap() == 1  # keeps min_size objects
+    assert slot.size == 2
+    assert not any(parser.disposed for parser in (parser2, parser3))
+
+
+def test_resource_pool_forgets_keys_left_without_objects(resource_pool):
+    clock = [0.0]
+    pool = resource_pool(max_idle=10, timer=lambda: clock[0])
+    for name in range(100):
+        with pool.acquire(name):
+            pass
+    assert len(pool._slots) == 100
+
+    clock[0] = 20
+    with pool.acquire('parser'):
+        assert pool.reap() == 100
+        assert list(pool._slots) == [pool._build_hash('parser')]  # still borrowed
+    assert len(pool._slots) == 1
+
+
+def test_resource_pool_frees_room_when_validation_raises(resource_pool):
+    def validate(resource):
+        if resource.name == 'broken':
+            raise ConnectionError(resource.name)
+        return True
+
+    pool = resource_pool(max_size=1, timeout=0.01, validate=validate)
+    with pool.acquire('broken'):
+        pass
+    with pytest.raises(ConnectionError):
+        with pool.acquire('broken'):
+            pass
+    assert pool._build_hash('broken') not in pool._slots  # left without objects
+
+
+def test_resource_pool_forgets_interrupted_waiters(resource_pool, monkeypatch):
+    import threading
+
+    class InterruptedEvent(threading.Event):
+        def wait(self, timeout=None):
+            raise KeyboardInterrupt
+
+    pool = resource_pool(max_size=1)
+    with pool.acquire('parser'):
+        monkeypatch.setattr(threading, 'Event', InterruptedEvent)
+        with pytest.raises(KeyboardInterrupt):
+            with pool.acquire('parser'):
+                pass
+        monkeypatch.undo()
+    slot = pool._slots[pool._build_hash('parser')]
+    assert not slot.waiters and len(slot.idle) == 1
+
+
+@pytest.mark.asyncio
+async def test_resource_pool_async_acquire_waits(resource_pool):
+    import asyncio
+
+    from software_patterns.memoize import PoolExhaustedError
+
+    pool = resource_pool(max_size=1, timeout=0.05)
+    order = []
+
+    async def borrow(label, hold):
+        async with pool.acquire_async('socket') as socket:
+            order.append(label)
+            await asyncio.sleep(hold)
+            return socket
+
+    sockets = await asyncio.gather(borrow('first', 0.01), borrow('second', 0))
+    assert order == ['first', 'second']
+    assert sockets[0] is sockets[1]
+
+    with pytest.raises(PoolExhaustedError):
+        await asyncio.gather(borrow('long', 0.1), borrow('impatient', 0))
+
+
+def test_memoize_function():
+    from software_patterns.memoize import memoize
+
+    calls = []
+
+    @memoize
+    def add(a, b=0):
+        """Add numbers."""
+        calls.append((a, b))
+        return a + b
+
+    assert add(1, b=2) == add(1, b=2) == 3
+    assert add(2) == 2
+    assert calls == [(1, 2), (2, 0)]
+    assert add.__doc__ == "Add numbers."
+    assert add.__name__ == 'add'
+    assert tuple(add.cache_info()) == (1, 2, None, 2)
+
+    add.cache_clear()
+    assert tuple(add.cache_info()) == (0, 0, None, 0)
+    add(1, b=2)
+    assert len(calls) == 3
+
+
+def test_memoize_methods_per_instance():
+    import gc
+
+    from software_patterns.memoize import memoize
+
+    class Shape:
+        calls: list = []
+
+        def __init__(self, size):
+            self.size = size
+
+        @memoize(capacity=4)
+        def scaled(self, factor):
+            self.calls.append((self.size, factor))
+            return self.size * factor
+
+        @classmethod
+        @memoize
+        def create(cls, size):
+            return cls(size)
+
+        @memoize
+        @staticmethod
+        def unit():
+            return object()
+
+    small, large = Shape(1), Shape(10)
+    assert small.scaled(2) == small.scaled(2) == 2
+    assert large.scaled(2) == 20
+    assert Shape.calls == [(1, 2), (10, 2)]
+    assert small.scaled.cache_info().hits == 1
+    assert Shape.scaled.cache_info() == (1, 2, 4, 2)
+
+    assert Shape.create(3) is Shape.create(3)
+    assert Shape.unit() is Shape.unit() is small.unit()
+
+    assert len(Shape.__dict__['scaled']._bound) == 2
+    del small
+    gc.collect()
+    assert len(Shape.__dict__['scaled']._bound) == 1
+
+
+def test_memoize_method_does_not_keep_instance_alive():
+    import gc
+    import weakref
+
+    from software_patterns.memoize import memoize
+
+    class Model:
+        @memoize
+        def predict(self, x):
+            return x
+
+    model = Model()
+    model.predict(1)
+    model_ref = weakref.ref(model)
+    del model
+    gc.collect()
+    assert model_ref() is None
+
+
+@pytest.fixture
+def interned():
+    class Table:
+        def __init__(self, name):
+            self.name = name
+
+    return Table
+
+
+def test_weak_values_pool_frees_unused_objects(interned):
+    import gc
+
+    from software_patterns import ObjectsPool
+
+    pool = ObjectsPool(interned, weak_values=True, capacity=10)
+    table = pool.get_object('a')
+    assert pool.get_object('a') is table
+    pool.get_object('b')
+    gc.collect()
+
+    assert len(pool._objects) == 1
+    assert pool.get_object('a') is table
+    del table
+    gc.collect()
+    assert len(pool._objects) == 0
+    assert pool.get_object('b').name == 'b'
+
+
+def test_weak_values_pool_capacity_only_counts_live_objects(interned):
+    import gc
+
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import LRUPolicy
+
+    policy = LRUPolicy(2)
+    pool = ObjectsPool(interned, weak_values=True, policy=policy)
+    table = pool.get_object('a')
+    for name in 'bcd':
+        pool.get_object(name)
+        gc.collect()
+    assert pool.get_object('a') is table
+    assert list(policy._keys) == ['d', 'a']
+
+
+def test_weak_values_pool_keeps_most_recent_objects_strongly(interned):
+    import gc
+
+    from software_patterns import ObjectsPool
+
+    pool = ObjectsPool(interned, weak_values=True, keep_strong=2)
+    first_id = id(pool.get_object('a'))
+    pool.get_object('b')
+    pool.get_object('a')  # 'a' becomes the most recently requested
+    pool.get_object('c')  # 'b' is now only weakly referenced
+    gc.collect()
+
+    assert sorted(table.name for table in pool._objects.values()) == ['a', 'c']
+    assert id(pool.get_object('a')) == first_id
+
+
+def test_keep_strong_requires_weak_values(interned):
+    from software_patterns import ObjectsPool
+
+    with pytest.raises(ValueError, match="requires weak_values"):
+        ObjectsPool(interned, keep_strong=2)
+
+
+def test_sqlite_store_survives_restarts(tmp_path):
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import SqliteStore
+
+    path = str(tmp_path / 'pool.sqlite')
+    constructed = []
+
+    def build(name, size=1):
+        constructed.append(name)
+        return {'name': name, 'size': size}
+
+    pool = ObjectsPool(build, store=SqliteStore(path))
+    assert pool.get_object('table', size=3) == {'name': 'table', 'size': 3}
+    pool.get_object(object())  # unstable key representation, never hits the store
+
+    restarted_pool = ObjectsPool(build, store=SqliteStore(path))
+    assert restarted_pool.get_object('table', size=3) == {'name': 'table', 'size': 3}
+    assert restarted_pool.get_object('table') == {'name': 'table', 'size': 1}
+    assert [name for name in constructed if name == 'table'] == ['table', 'table']
+
+    upgraded_pool = ObjectsPool(build, store=SqliteStore(path, version='2'))
+    upgraded_pool.get_object('table', size=3)
+    assert [name for name in constructed if name == 'table'] == ['table'] * 3
+
+
+def test_sqlite_store_skips_unserialisable_objects(tmp_path):
+    import threading
+
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import SqliteStore
+
+    store = SqliteStore(str(tmp_path / 'pool.sqlite'))
+    pool = ObjectsPool(lambda name: threading.Lock(), store=store)
+    lock = pool.get_object('a')
+    assert pool.get_object('a') is lock
+    assert store.load('a') == (False, None)
+    store.close()
+
+
+def test_sqlite_store_skips_keys_with_unstable_representations(tmp_path):
+    import sqlite3
+
+    from software_patterns.memoize import SqliteStore
+
+    class Config:
+        pass
+
+    path = str(tmp_path / 'pool.sqlite')
+    store = SqliteStore(path)
+    for _ in range(3):
+        store.save(Config(), 'value')
+    store.save('stable', 'value')
+    store.close()
+    with sqlite3.connect(path) as connection:
+        assert connection.execute('SELECT count(*) FROM objects').fetchone() == (1,)
+
+    named_store = SqliteStore(path, key_serializer=lambda key: type(key).__name__)
+    named_store.save(Config(), 'value')
+    assert named_store.load(Config()) == (True, 'value')
+    named_store.close()
+
+
+def test_sqlite_store_bounds_rows_and_vacuums_stale_versions(tmp_path):
+    from software_patterns.memoize import SqliteStore
+
+    path = str(tmp_path / 'pool.sqlite')
+    old_store = SqliteStore(path, version='1')
+    old_store.save('old', 0)
+    old_store.close()
+
+    store = SqliteStore(path, version='2', max_rows=3)
+    for number in range(5):
+        store.save(number, number)
+    assert [store.load(number)[0] for number in range(5)] == [False, False, True, True, True]
+    store.save(2, 2)  # saved again, so no longer the least recent
+    store.save(5, 5)
+    assert [store.load(number)[0] for number in (2, 3, 4, 5)] == [True, False, True, True]
+
+    store = SqliteStore(path, version='2')
+    assert store.vacuum() == 0  # the entry of the old version was the least recent
+    store.save('old', 1)  # overwrites the entry of the old version
+    old_store = SqliteStore(path, version='1')
+    old_store.save('older', 0)
+    assert store.vacuum() == 1
+    assert old_store.load('older') == (False, None)
+    store.close()
+    old_store.close()
+
+
+def _shared_table_worker(pool, queue):
+    view = pool.get_object(3)
+    queue.put(bytes(view))
+    pool.close()
+
+
+def test_shared_pool_shares_objects_across_processes():
+    import multiprocessing
+    from multiprocessing import shared_memory
+
+    from software_patterns.memoize import SharedObjectsPool
+
+    constructed = []
+
+    def build_table(size):
+        constructed.append(size)
+        return bytes(range(size))
+
+    pool = SharedObjectsPool(build_table)
+    view = pool.get_object(3)
+    assert bytes(view) == b'\x00\x01\x02'
+    assert pool.get_object(3) is view
+    segment_name = pool._segments[pool._build_hash(3)].name
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    worker = context.Process(target=_shared_table_worker, args=(pool, queue))
+    worker.start()
+    assert queue.get(timeout=10) == b'\x00\x01\x02'
+    worker.join(timeout=10)
+    assert worker.exitcode == 0
+    assert constructed == [3]  # the worker attached to the parent's object
+
+    pool.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment_name)
+
+
+def _shared_table_leaving_worker(pool, queue):
+    queue.put(bytes(pool.get_object(3)))  # exits without closing the pool
+
+
+def test_shared_pool_detaches_workers_on_exit(capfd):
+    import multiprocessing
+    from multiprocessing import shared_memory
+
+    from software_patterns.memoize import SharedObjectsPool
+
+    pool = SharedObjectsPool(bytes)
+    view = pool.get_object(3)
+    segment_name = pool._segments[pool._build_hash(3)].name
+
+    context = multiprocessing.get_context('fork')
+    queue = context.Queue()
+    worker = context.Process(target=_shared_table_leaving_worker, args=(pool, queue))
+    worker.start()
+    assert queue.get(timeout=30) == bytes(view)
+    worker.join(timeout=30)
+    assert worker.exitcode == 0
+
+    pool.close()
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment_name)
+    assert 'BufferError' not in capfd.readouterr().err
+
+
+def test_shared_pool_is_closed_once_garbage_collected():
+    import gc
+    import weakref
+    from multiprocessing import shared_memory
+
+    from software_patterns.memoize import SharedObjectsPool
+
+    pool = SharedObjectsPool(bytes)
+    pool.get_object(3)
+    segment_name = pool._segments[pool._build_hash(3)].name
+    reference = weakref.ref(pool)
+
+    del pool
+    gc.collect()
+    assert reference() is None
+    with pytest.raises(FileNotFoundError):
+        shared_memory.SharedMemory(name=segment_name)
+
+
+def test_pool_stats_counts_activity():
+    from typing import Any, Dict, List
+
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import PoolStats
+
+    snapshots: List[Dict[str, Any]] = []
+    stats = PoolStats(sink=snapshots.append, sample_every=2)
+    pool = ObjectsPool(lambda x: [x], capacity=2, stats=stats)
+    for x in (1, 1, 2, 1, 3, 2):
+        pool.get_object(x)
+
+    assert (stats.hits, stats.misses, stats.constructions, stats.evictions) == (2, 4, 4, 2)
+    assert sum(stats.latency_histogram) == 4
+    assert sum(count for _, count in stats.hot_keys()) == 3
+
+    stats.export()
+    assert snapshots[0]['size'] == 2
+    assert sum(snapshots[0]['construction_latency_ns'].values()) == 4
+
+    stats.reset()
+    assert stats.snapshot()['hits'] == 0
+
+
+def test_pool_without_stats_is_not_instrumented():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import PoolStats
+
+    assert 'get_object' not in vars(ObjectsPool(list))
+    assert 'get_object' in vars(ObjectsPool(list, stats=PoolStats()))
+
+
+def test_get_objects_many_with_bulk_callback():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import PoolStats
+
+    batches = []
+
+    def build_many(arguments):
+        batches.append(arguments)
+        return [[a, b] for a, b in arguments]
+
+    stats = PoolStats()
+    pool = ObjectsPool(lambda a, b: [a, b], bulk_callback=build_many, stats=stats)
+    pooled = pool.get_object(1, 1)
+    objects = pool.get_objects_many([(1, 1), (2, 2), (3, 3), (2, 2)])
+
+    assert objects == [[1, 1], [2, 2], [3, 3], [2, 2]]
+    assert objects[0] is pooled
+    assert objects[1] is objects[3]
+    assert batches == [[(2, 2), (3, 3)]]
+    assert pool.get_object(3, 3) is objects[2]
+    assert (stats.hits, stats.misses, stats.constructions) == (3, 3, 3)
+
+
+def test_get_objects_many_without_bulk_callback():
+    from software_patterns import ObjectsPool
+
+    constructed = []
+
+    def build(x):
+        constructed.append(x)
+        return [x]
+
+    for thread_safe in (False, True):
+        constructed.clear()
+        pool = ObjectsPool(build, capacity=2, thread_safe=thread_safe)
+        assert pool.get_objects_many(iter([(1,), (2,), (1,), (3,)])) == [[1], [2], [1], [3]]
+        assert constructed == [1, 2, 3]
+        assert len(pool._objects) == 2
+
+
+def test_get_objects_many_resolves_repeated_expired_keys_once():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import TTLPolicy
+
+    clock = [0.0]
+    for thread_safe in (False, True):
+        clock[0] = 0.0
+        pool = ObjectsPool(
+            lambda x: object(),
+            policy=TTLPolicy(10, timer=lambda: clock[0]),
+            thread_safe=thread_safe,
         )
+        obj = pool.get_object(1)
+        clock[0] = 11
+        first, second = pool.get_objects_many([(1,), (1,)])
+        assert first is second is not obj
+        assert pool.get_object(1) is first
+
+
+def test_get_objects_many_rejects_bulk_callback_mismatch():
+    from software_patterns import ObjectsPool
+
+    pool = ObjectsPool(lambda x: x, bulk_callback=lambda arguments: [])
+    with pytest.raises(ValueError, match="returned 0 objects for 1 argument tuples"):
+        pool.get_objects_many([(1,)])
+
+
+def test_refresh_ahead_serves_stale_object_while_rebuilding():
+    import time
+
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import TTLPolicy
+
+    versions = []
+
+    def load_config(name):
+        versions.append(name)
+        return {'name': name, 'version': len(versions)}
+
+    pool = ObjectsPool(load_config, policy=TTLPolicy(10), refresh_after=0.01)
+    config = pool.get_object('app')
+    assert pool.get_object('app') is config  # fresh: no refresh
+    time.sleep(0.02)
+
+    assert pool.get_object('app') is config  # soft expired: served stale
+    deadline = time.monotonic() + 5
+    while pool._refreshing and time.monotonic() < deadline:
+        time.sleep(0.001)
+    refreshed = pool.get_object('app')
+    assert refreshed['version'] == 2
+    assert len(versions) == 2
+
+
+def test_refresh_ahead_failures_are_logged(caplog):
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from software_patterns import ObjectsPool
+
+    versions = []
+
+    def load_config(name):
+        versions.append(name)
+        if len(versions) > 1:
+            raise RuntimeError('unreachable')
+        return object()
+
+    executor = ThreadPoolExecutor(1)
+    executor.shutdown()
+    pool = ObjectsPool(load_config, refresh_after=0.01, refresh_executor=executor)
+    config = pool.get_object('app')
+    time.sleep(0.02)
+    assert pool.get_object('app') is config  # served stale, though not refreshed
+    assert not pool._refreshing
+
+    pool._refresh_executor = None  # refresh on a fresh executor, which fails
+    assert pool.get_object('app') is config
+    deadline = time.monotonic() + 5
+    while pool._refreshing and time.monotonic() < deadline:
+        time.sleep(0.001)
+    assert pool.get_object('app') is config
+    assert [record.getMessage() for record in caplog.records] == [
+        'Failed to schedule refreshing a pooled object',
+        'Failed to refresh a pooled object',
+    ]
+
+
+def test_refresh_ahead_with_inline_executor_and_invalidation():
+    import time
+    from concurrent.futures import Executor, Future
+
+    from software_patterns import ObjectsPool
+
+    class InlineExecutor(Executor):
+        def submit(self, *args, **kwargs):
+            future: Future = Future()
+            future.set_result(args[0](*args[1:], **kwargs))
+            return future
+
+    versions = []
+
+    def load_config(name):
+        versions.append(name)
+        if len(versions) == 3:
+            pool.invalidate(name)  # while refreshing
+        return len(versions)
+
+    pool = ObjectsPool(load_config, refresh_after=0.01, refresh_executor=InlineExecutor())
+    assert pool.get_object('app') == 1
+    time.sleep(0.02)
+    assert pool.get_object('app') == 1  # refreshed inline, without deadlocking
+    assert pool.get_object('app') == 2
+    time.sleep(0.02)
+    assert pool.get_object('app') == 2  # the refresh is dropped, once invalidated
+    assert pool.get_object('app') == 4
+
+
+@pytest.mark.asyncio
+async def test_refresh_ahead_on_event_loop():
+    import asyncio
+
+    from software_patterns import ObjectsPool
+
+    versions = []
+
+    async def fetch(name):
+        versions.append(name)
+        return len(versions)
+
+    pool = ObjectsPool(fetch, refresh_after=0.01)
+    assert await pool.get_object_async('remote') == 1
+    await asyncio.sleep(0.02)
+    assert await pool.get_object_async('remote') == 1
+    await asyncio.sleep(0.01)
+    assert await pool.get_object_async('remote') == 2
+
+
+def test_negative_cache_backs_off_exponentially():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import NegativeCache
+
+    clock = [0.0]
+    attempts = []
+
+    def connect(host):
+        attempts.append(host)
+        if host == 'bad':
+            raise ConnectionError(host)
+        return host
+
+    negative_cache = NegativeCache(
+        backoff=10, multiplier=2, max_backoff=15, timer=lambda: clock[0]
+    )
+    pool = ObjectsPool(connect, negative_cache=negative_cache)
+
+    def fails():
+        with pytest.raises(ConnectionError):
+            pool.get_object('bad')
+
+    fails()
+    fails()
+    assert attempts == ['bad']
+    clock[0] = 10.0  # window passed: retried, failing again, now for 20 (capped to 15) seconds
+    fails()
+    assert attempts == ['bad', 'bad']
+    clock[0] = 24.0
+    fails()
+    assert attempts == ['bad', 'bad']
+    clock[0] = 25.0
+    fails()
+    assert attempts == ['bad', 'bad', 'bad']
+    assert pool.get_object('good') == 'good'
+
+
+def test_negative_cache_rules_per_exception_type():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import NegativeCache
+
+    attempts = []
+
+    def load(name):
+        attempts.append(name)
+        raise {'missing': FileNotFoundError, 'denied': PermissionError}.get(name, ValueError)(
+            name
+        )
+
+    pool = ObjectsPool(
+        load, negative_cache=NegativeCache(rules={PermissionError: 0}, exceptions=(OSError,))
+    )
+    for name in ('missing', 'denied', 'invalid'):
+        for _ in range(2):
+            with pytest.raises(Exception):
+                pool.get_object(name)
+    # FileNotFoundError remembered, PermissionError ruled out, ValueError not an OSError
+    assert attempts == ['missing', 'denied', 'denied', 'invalid', 'invalid']
+    pool.clear()
+    with pytest.raises(FileNotFoundError):
+        pool.get_object('missing')
+    assert attempts[-1] == 'missing'
+
+
+@pytest.mark.asyncio
+async def test_negative_cache_on_async_requests():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import NegativeCache
+
+    attempts = []
+
+    async def fetch(url):
+        attempts.append(url)
+        raise TimeoutError(url)
+
+    pool = ObjectsPool(fetch, negative_cache=NegativeCache(backoff=60))
+    for _ in range(3):
+        with pytest.raises(TimeoutError):
+            _ = await pool.get_object_async('url')
+    assert attempts == ['url']
+
+
+def test_sharded_pool_spreads_keys_over_shards():
+    from software_patterns.memoize import ShardedObjectsPool
+
+    pool = ShardedObjectsPool(lambda number: [number], shards=3, capacity=40)
+    assert len(pool.shards) == 4
+    objects = [pool.get_object(number) for number in range(40)]
+    assert all(pool.get_object(number) is objects[number] for number in range(40))
+    assert all(0 < len(shard._objects) <= 10 for shard in pool.shards)
+    assert len(pool) == 40
+    pool.clear()
+    assert len(pool) == 0
+
+
+def test_sharded_pool_constructs_once_under_concurrency():
+    import threading
+
+    from software_patterns.memoize import ShardedObjectsPool
+
+    constructed = []
+
+    def build(number):
+        constructed.append(number)
+        return [number]
+
+    pool = ShardedObjectsPool(build)
+    barrier = threading.Barrier(8)
+
+    def request():
+        barrier.wait()
+        for number in range(200):
+            pool.get_object(number % 50)
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert sorted(constructed) == list(range(50))
+
+
+def test_invalidation_by_tag_cascades_to_dependents():
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import make_key
+
+    def build(name, region):
+        return [name, region]
+
+    pool = ObjectsPool(
+        build,
+        capacity=10,
+        tags_callback=lambda name, region: [region],
+        dependencies_callback=lambda name, region: (
+            [make_key('config', region)] if name != 'config' else []
+        ),
     )
+    eu_config, eu_user, us_config, us_user = [
+        pool.get_object(name, region) for region in ('eu', 'us') for name in ('config', 'user')
+    ]
+    report = pool.get_object('report', 'global')  # depends on a config never requested
+
+    assert pool.invalidate('config', 'eu') == 2
+    assert pool.get_object('config', 'us') is us_config
+    assert pool.get_object('user', 'us') is us_user
+    assert pool.get_object('user', 'eu') is not eu_user
+    assert pool.get_object('report', 'global') is report
+    assert pool.invalidate_tag('us') == 2
+    assert pool.invalidate_tag('us') == 0
+    assert pool.invalidate('config', 'global') == 1
+    assert list(pool._objects) == [make_key('user', 'eu')]
+    assert set(pool._tagged) == {'eu'}
+    assert set(pool._dependents) == {make_key('config', 'eu')}
+
+
+def test_invalidation_removes_objects_from_store(tmp_path):
+    from software_patterns import ObjectsPool
+    from software_patterns.memoize import SqliteStore
+
+    constructed = []
+    store = SqliteStore(str(tmp_path / 'pool.sqlite'))
+
+    def build(name):
+        constructed.append(name)
+        return name
+
+    pool = ObjectsPool(build, store=store)
+    pool.get_object('settings')
+    assert pool.invalidate('settings') == 1
+    assert store.load(pool._build_hash('settings')) == (False, None)
+    pool.get_object('settings')
+    assert constructed == ['settings', 'settings']